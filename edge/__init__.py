@@ -0,0 +1,7 @@
+"""
+Shared edge runtime for the on-bus safety detectors (footboard, window, driver).
+
+Hosts every YOLO model in one process behind a single scheduler and shared
+camera decoders. The per-detector scripts in `footboard safety/`,
+`window safety/` and `Driver monitering/` are thin launchers around it.
+"""
@@ -0,0 +1,64 @@
+"""
+Speed- and enable-aware adaptive inference rate.
+
+Each detector asks `should_infer()` before spending a model call on a frame:
+
+    system disabled (heartbeat)          -> suspended, no inference
+    moving, or a detection in last HOLD  -> full rate
+    stationary (fresh GPS reading)       -> STATIONARY_FPS
+
+Conditions are re-evaluated on every camera frame, so the detector is back at
+full rate on the very next frame after speed crosses the threshold or
+something is detected. A stale or missing speed reading never counts as
+stationary.
+"""
+import time
+
+from edge import config
+
+
+class AdaptiveRate:
+    def __init__(self, speed=None, moving_kmh=config.MOVING_KMH, idle_fps=config.STATIONARY_FPS,
+                 hold=config.DETECTION_HOLD, idle_when_stationary=True):
+        self.speed = speed
+        self.moving_kmh = moving_kmh
+        self.idle_interval = 1.0 / idle_fps if idle_fps > 0 else float("inf")
+        self.hold = hold
+        self.idle_when_stationary = idle_when_stationary
+        self.system_enabled = True  # Updated from heartbeat responses
+        self.last_infer = 0.0
+        self.last_detection = 0.0
+        self.skipped = 0
+        self.mode = "full"
+
+    def stationary(self, now):
+        if self.speed is None or not self.idle_when_stationary:
+            return False
+        if self.speed.stale:
+            return False  # Unknown speed - stay at full rate
+        return self.speed.speed_kmh <= self.moving_kmh
+
+    def should_infer(self, now=None):
+        now = time.time() if now is None else now
+        if not self.system_enabled:
+            mode = "suspended"
+        elif now - self.last_detection < self.hold or not self.stationary(now):
+            mode = "full"
+        else:
+            mode = "idle"
+
+        if mode != self.mode:
+            print(f"[{time.strftime('%H:%M:%S')}] ⏱️ Inference rate: {self.mode} -> {mode}")
+            self.mode = mode
+
+        run = mode == "full" or (mode == "idle" and now - self.last_infer >= self.idle_interval)
+        if run:
+            self.last_infer = now
+        else:
+            self.skipped += 1
+        return run
+
+    def observe(self, detections, now=None):
+        """Hold full rate for a while after anything is detected"""
+        if len(detections):
+            self.last_detection = time.time() if now is None else now
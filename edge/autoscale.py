@@ -0,0 +1,96 @@
+"""
+Closed-loop FPS autoscaler.
+
+Opt-in with AUTOSCALE=1. Detectors hosted in one engine share its thread,
+so each gets 1 / (AUTOSCALE_FPS * detectors) seconds per camera frame. After
+every frame that runs YOLO the autoscaler updates a moving average of the
+predict time - frames served by the motion gate, the tracker or the cascade
+cost next to nothing and do not depend on imgsz, so they are only counted.
+At most every AUTOSCALE_INTERVAL seconds it compares the cost per camera
+frame (latency x share of frames that ran YOLO / stride) with that budget:
+
+    over budget          -> smaller imgsz (32 px steps down to AUTOSCALE_MIN_IMGSZ),
+                            then a larger frame stride (up to AUTOSCALE_MAX_STRIDE)
+    predicted to fit     -> undo in reverse: stride first, then imgsz back up to
+    with 20% to spare       the detector's configured size
+
+Exported ONNX/OpenVINO graphs have a fixed input size, so for those only the
+stride moves. Every change is logged with the measured latency and FPS.
+"""
+import time
+from datetime import datetime
+
+from edge import config
+
+MIN_SAMPLES = 5  # Frames measured at a setting before judging it
+SMOOTHING = 0.2
+HEADROOM = 0.8  # Scale up only if the predicted cost stays below this share of the budget
+
+
+class Autoscaler:
+    def __init__(self, det, share=1, target_fps=config.AUTOSCALE_FPS, min_imgsz=config.AUTOSCALE_MIN_IMGSZ,
+                 max_stride=config.AUTOSCALE_MAX_STRIDE, fixed_imgsz=False):
+        self.det = det
+        self.target_fps = target_fps
+        self.budget = 1.0 / (target_fps * share)
+        max_imgsz = det.predict_kwargs.get("imgsz", 640)
+        self.sizes = [max_imgsz] if fixed_imgsz else list(range(max_imgsz, min(min_imgsz, max_imgsz) - 1, -32))
+        self.level = 0  # Index into sizes, 0 = configured size
+        self.stride = 1
+        self.max_stride = max_stride
+        self.latency = None  # Moving average, seconds per processed frame
+        self.samples = 0
+        self.seen = 0
+        self.taken = 0  # Frames let through since the last change
+        self.processed = 0  # Of those, frames that ran YOLO
+        self.last_change = None
+
+    @property
+    def imgsz(self):
+        return self.sizes[self.level]
+
+    def take(self):
+        """True if this camera frame should be processed at the current stride"""
+        self.seen += 1
+        if self.seen % self.stride:
+            return False
+        self.taken += 1
+        return True
+
+    def observe(self, elapsed, now=None):
+        """Record one YOLO pass's time and adjust if due"""
+        now = time.time() if now is None else now
+        if self.last_change is None:
+            self.last_change = now
+        self.latency = elapsed if self.latency is None else (1 - SMOOTHING) * self.latency + SMOOTHING * elapsed
+        self.samples += 1
+        self.processed += 1
+        if self.samples < MIN_SAMPLES or now - self.last_change < config.AUTOSCALE_INTERVAL:
+            return
+
+        per_frame = self.latency * min(1.0, self.processed / max(self.taken, 1))  # Cheap frames cost ~0
+        cost = per_frame / self.stride
+        if cost > self.budget:
+            if self.level < len(self.sizes) - 1:
+                self.apply(self.level + 1, self.stride, now)
+            elif self.stride < self.max_stride:
+                self.apply(self.level, self.stride + 1, now)
+        elif self.stride > 1:
+            if per_frame / (self.stride - 1) < HEADROOM * self.budget:
+                self.apply(self.level, self.stride - 1, now)
+        elif self.level > 0:
+            scale = (self.sizes[self.level - 1] / self.imgsz) ** 2  # Cost grows with input area
+            if per_frame * scale < HEADROOM * self.budget:
+                self.apply(self.level - 1, self.stride, now)
+
+    def apply(self, level, stride, now):
+        fps = self.taken / (now - self.last_change)
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] ⚙️ {self.det.name}: imgsz {self.imgsz} -> {self.sizes[level]}, "
+              f"stride {self.stride} -> {stride} (latency {1000 * self.latency:.0f} ms, "
+              f"budget {1000 * self.budget:.0f} ms, {fps:.1f} fps)")
+        self.level = level
+        self.stride = stride
+        self.det.predict_kwargs = {**self.det.predict_kwargs, "imgsz": self.imgsz}
+        self.latency = None
+        self.samples = self.taken = self.processed = 0
+        self.last_change = now
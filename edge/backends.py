@@ -0,0 +1,33 @@
+"""
+Inference backend selection.
+
+`python -m edge.export` writes ONNX / OpenVINO artifacts next to each `.pt`.
+When one is present the engine loads it instead of the PyTorch weights -
+preferring INT8 OpenVINO, then FP32 OpenVINO, INT8 ONNX, FP32 ONNX.
+"""
+import os
+
+from edge import config
+
+
+def artifact_paths(weights):
+    """Exported artifact locations for `weights`, keyed by backend name"""
+    stem = os.path.splitext(weights)[0]
+    return {
+        "openvino-int8": f"{stem}_int8_openvino_model",
+        "openvino": f"{stem}_openvino_model",
+        "onnx-int8": f"{stem}.int8.onnx",
+        "onnx": f"{stem}.onnx",
+    }
+
+
+def resolve_weights(weights, backend=config.BACKEND):
+    """Pick the artifact to load for `weights`; falls back to the .pt"""
+    if backend == "pt":
+        return weights
+    for name, path in artifact_paths(weights).items():
+        if backend != "auto" and not name.startswith(backend):
+            continue
+        if os.path.exists(path):
+            return path
+    return weights
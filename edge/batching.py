@@ -0,0 +1,188 @@
+"""
+Batched cross-camera inference for a depot server watching many buses.
+
+Streams that use the same YOLO weights are grouped. Each scheduler pass
+collects the latest unseen frame from up to `max_batch` cameras (waiting at
+most `max_wait` seconds for stragglers), runs them through the model in one
+`predict()` call, and hands every result back to that bus's detector.
+
+Usage:
+    python -m edge.batching depot.json
+
+depot.json:
+    {
+        "max_batch": 8,
+        "max_wait_ms": 30,
+        "streams": [
+            {"driver_id": "...", "video_url": "http://10.0.0.5:8080/video",
+             "sensor_url": "http://10.0.0.5:8080/sensors.json",
+             "detectors": ["footboard", "window"]}
+        ]
+    }
+"""
+import argparse
+import json
+import time
+from collections import defaultdict
+
+from edge import camera, config, heartbeat
+from edge.dispatch import stop_dispatcher
+from edge.engine import (absorb, build_detectors, exit_on_sigterm, finish, load_model, model_inputs, predict, prepare,
+                         skip_inference)
+
+MAX_BATCH = 8
+MAX_WAIT = 0.03  # Seconds to wait for a full batch before running a partial one
+
+
+class BatchGroup:
+    """All detectors sharing one model, inferred together"""
+
+    def __init__(self, detectors, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.detectors = detectors
+        self.weights = detectors[0].weights
+        self.predict_kwargs = detectors[0].predict_kwargs
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cursor = 0  # Round-robin start so no bus starves when N > max_batch
+        self.batches = 0
+        self.frames = 0
+
+    def collect(self):
+        """Gather up to max_batch fresh frames, bounded by the max_wait deadline"""
+        batch = []
+        taken = set()
+        deadline = time.time() + self.max_wait
+        count = len(self.detectors)
+
+        while True:
+            for i in range(count):
+                det = self.detectors[(self.cursor + i) % count]
+                if id(det) in taken:
+                    continue
+                frame = det.camera.latest()
+                if frame is None or frame.id <= det.frame_id:
+                    continue
+                det.frame_id = frame.id
+                taken.add(id(det))
+                if det.rate is not None and not det.rate.should_infer():
+                    continue
+                frame = det.camera.decode(frame)  # Only frames that will be inferred
+                if frame is None:
+                    continue
+                # Resized copy now - the camera's ring may overwrite its slot while the batch fills
+                batch.append((det, prepare(det, frame.image)))
+                if len(batch) >= self.max_batch:
+                    break
+            if len(batch) >= self.max_batch or len(taken) == count or time.time() >= deadline:
+                break
+            time.sleep(0.002)
+
+        self.cursor = (self.cursor + len(batch)) % count
+        return batch
+
+    def run_once(self):
+        """Infer one batch and dispatch results; returns batch size"""
+        batch = self.collect()
+        if not batch:
+            return 0
+
+        # Static scenes, in-between tracked frames and gated-out frames stay out of the batch
+        pending = []
+        for det, frame in batch:
+            shortcut = skip_inference(det, frame)
+            if shortcut is not None:
+                finish(det, shortcut[1], frame)
+            else:
+                pending.append((det, frame))
+        if not pending:
+            return len(batch)
+
+        # Streams with an ROI contribute one input per ROI window
+        inputs, spans = [], []
+        for det, frame in pending:
+            crops = model_inputs(det, frame)
+            spans.append((len(inputs), len(crops)))
+            inputs += crops
+
+        results = predict(self.weights, inputs, **self.predict_kwargs)
+        for (det, frame), (start, count) in zip(pending, spans):
+            _, detections = absorb(det, results[start:start + count], frame)
+            finish(det, detections, frame)
+
+        self.batches += 1
+        self.frames += len(pending)
+        return len(batch)
+
+
+class BatchEngine:
+    """Depot scheduler - one batched predict per model per pass"""
+
+    def __init__(self, detectors, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.detectors = detectors
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.groups = []
+        self.stopped = False
+
+    def start(self):
+        by_weights = defaultdict(list)
+        for det in self.detectors:
+            det.bind(load_model(det.weights))
+            det.camera = camera.open_camera(det.video_url, det.input_size())
+            by_weights[det.weights].append(det)
+        self.groups = [BatchGroup(dets, self.max_batch, self.max_wait) for dets in by_weights.values()]
+        heartbeat.start(self.detectors)
+        for group in self.groups:
+            print(f"✓ {group.detectors[0].name}: {len(group.detectors)} streams, batch ≤ {self.max_batch}")
+
+    def run(self):
+        report_time = time.time()
+        try:
+            while not self.stopped:
+                processed = sum(group.run_once() for group in self.groups)
+                if not processed:
+                    time.sleep(0.005)  # Every camera is behind - don't spin
+
+                if time.time() - report_time >= 10:
+                    for group in self.groups:
+                        avg = group.frames / group.batches if group.batches else 0
+                        print(f"📊 {group.detectors[0].name}: {group.frames} frames in {group.batches} batches (avg {avg:.1f})")
+                    report_time = time.time()
+        except KeyboardInterrupt:
+            self.stopped = True
+
+        for det in self.detectors:
+            if det.recorder is not None:
+                det.recorder.close()
+        camera.release_all()
+        stop_dispatcher()  # Queued alerts go to the spool
+
+
+def load_depot(path):
+    """Build detectors for every stream in a depot config file"""
+    with open(path) as f:
+        depot = json.load(f)
+
+    detectors = []
+    for stream in depot["streams"]:
+        detectors += build_detectors(
+            stream.get("detectors", ["footboard", "window", "driver"]),
+            driver_id=stream["driver_id"],
+            video_url=stream["video_url"],
+            sensor_url=stream.get("sensor_url", config.SENSOR_URL),
+        )
+    max_batch = depot.get("max_batch", MAX_BATCH)
+    max_wait = depot.get("max_wait_ms", MAX_WAIT * 1000) / 1000
+    return BatchEngine(detectors, max_batch, max_wait)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched depot inference")
+    parser.add_argument("depot", help="Depot stream configuration (JSON)")
+    args = parser.parse_args()
+
+    exit_on_sigterm()
+    engine = load_depot(args.depot)
+    engine.start()
+    print("Depot batching running. Ctrl+C to stop.")
+    engine.run()
@@ -0,0 +1,191 @@
+"""
+Recorded-clip benchmark for the detection pipelines.
+
+Runs each detector over a recorded clip through the same `Engine.step` the
+live system uses, but with deterministic frame pacing: every frame is
+processed in order (lock-step), or - with `--pace` - released at the clip's
+native FPS without dropping. Reports throughput, per-frame latency
+p50/p95/p99, CPU and peak RSS as JSON and compares against a stored baseline.
+
+Usage:
+    python -m edge.bench --clip footboard=clips/footboard.mp4 --clip window=clips/window.mp4
+    python -m edge.bench --clip driver=clips/driver.mp4 --save-baseline
+    python -m edge.bench --clip footboard=clips/footboard.mp4 --baseline bench_baseline.json --tolerance 0.1
+
+Exits with status 1 if any detector regressed beyond the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from edge import config
+from edge.camera import ClipCamera
+from edge.dispatch import RecordingDispatcher, set_dispatcher
+from edge.engine import DETECTOR_NAMES, Engine, build_detectors, load_model
+from edge.sensors import FixedSpeed
+
+BASELINE_PATH = "bench_baseline.json"
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:  # Windows
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def bench_detector(engine, det, clip, max_frames=None, warmup=5, pace=False):
+    """Run one detector over `clip`; returns its metrics"""
+    det.bind(load_model(det.weights))
+    det.camera = ClipCamera(clip)
+    frame_interval = 1.0 / det.camera.fps
+
+    latencies = []
+    frames = 0
+    cpu_start = time.process_time()
+    wall_start = measure_start = time.perf_counter()
+
+    while max_frames is None or frames < max_frames + warmup:
+        if pace:
+            # Release frame N at N / fps - late frames are processed, never dropped
+            due = wall_start + frames * frame_interval
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        start = time.perf_counter()
+        engine.step(det)
+        elapsed = time.perf_counter() - start
+        if det.camera.finished:
+            break
+
+        frames += 1
+        if frames == warmup:
+            cpu_start = time.process_time()
+            measure_start = time.perf_counter()
+        elif frames > warmup:
+            latencies.append(elapsed)
+
+    wall = time.perf_counter() - measure_start
+    cpu = time.process_time() - cpu_start
+    det.camera.release()
+
+    measured = len(latencies)
+    gate = det.motion_gate
+    return {
+        "clip": os.path.basename(clip),
+        "frames": measured,
+        "throughput_fps": round(measured / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(1000 * sum(latencies) / measured, 2) if measured else 0.0,
+            "p50": round(1000 * percentile(latencies, 50), 2),
+            "p95": round(1000 * percentile(latencies, 95), 2),
+            "p99": round(1000 * percentile(latencies, 99), 2),
+        },
+        "cpu_percent": round(100 * cpu / wall, 1) if wall else 0.0,  # 100 = one full core
+        "motion_skipped": gate.skipped if gate is not None else 0,
+        "cascade": det.cascade.stats() if det.cascade is not None else None,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """List regressions of `report` against `baseline` beyond `tolerance`"""
+    regressions = []
+    for name, current in report["detectors"].items():
+        previous = baseline.get("detectors", {}).get(name)
+        if previous is None:
+            continue
+        checks = [
+            ("throughput_fps", current["throughput_fps"], previous["throughput_fps"], -1),
+            ("latency p95", current["latency_ms"]["p95"], previous["latency_ms"]["p95"], 1),
+            ("latency p99", current["latency_ms"]["p99"], previous["latency_ms"]["p99"], 1),
+        ]
+        for metric, now, before, direction in checks:
+            if before and direction * (now - before) / before > tolerance:
+                regressions.append(f"{name}: {metric} {before} -> {now}")
+    previous_rss = baseline.get("peak_rss_mb")
+    if previous_rss and (report["peak_rss_mb"] - previous_rss) / previous_rss > tolerance:
+        regressions.append(f"peak RSS {previous_rss} -> {report['peak_rss_mb']} MB")
+    return regressions
+
+
+def run_bench(clips, max_frames=None, warmup=5, pace=False, speed_kmh=0.0):
+    """Benchmark every `name -> clip` pair; alerts are recorded, never posted"""
+    set_dispatcher(RecordingDispatcher())
+    detectors = build_detectors(list(clips), speed_tracker=FixedSpeed(speed_kmh), adaptive=False,
+                                record=False)
+    engine = Engine(detectors, headless=True, preview_port=0)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "backend": config.BACKEND,
+        "pace": "realtime" if pace else "lockstep",
+        "detectors": {},
+    }
+    for det in detectors:
+        print(f"⏱️ Benchmarking {det.name} on {clips[det.name]}...", file=sys.stderr)
+        report["detectors"][det.name] = bench_detector(engine, det, clips[det.name], max_frames, warmup, pace)
+    report["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recorded-clip benchmark")
+    parser.add_argument("--clip", action="append", required=True, metavar="DETECTOR=PATH",
+                        help=f"Clip per detector ({', '.join(DETECTOR_NAMES)})")
+    parser.add_argument("--frames", type=int, help="Frames per detector (default: whole clip)")
+    parser.add_argument("--warmup", type=int, default=5, help="Frames excluded from the metrics")
+    parser.add_argument("--pace", action="store_true", help="Release frames at the clip's FPS")
+    parser.add_argument("--speed", type=float, default=0.0, help="Bus speed (km/h) for the footboard logic")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    clips = {}
+    for spec in args.clip:
+        name, _, path = spec.partition("=")
+        if name not in DETECTOR_NAMES or not path:
+            parser.error(f"--clip must be DETECTOR=PATH with DETECTOR in {DETECTOR_NAMES}")
+        clips[name] = path
+
+    report = run_bench(clips, args.frames, args.warmup, args.pace, args.speed)
+
+    status = 0
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}", file=sys.stderr)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(report, baseline, args.tolerance)
+        for line in report["regressions"]:
+            print(f"❌ Regression - {line}", file=sys.stderr)
+        status = 1 if report["regressions"] else 0
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    sys.exit(status)
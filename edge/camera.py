@@ -0,0 +1,366 @@
+"""
+Threaded camera decoders shared between detectors.
+"""
+import io
+import os
+import threading
+import time
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+import requests
+
+from edge import config
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov")
+
+
+# --- THREADED CAMERA CLASS (LOW LATENCY) ---
+class Frame(NamedTuple):
+    id: int            # Monotonically increasing per camera, first frame is 1
+    timestamp: float   # time.time() when capture finished
+    image: object      # BGR ndarray - a view into the ring, valid for RING_SIZE - 1 more captures
+
+
+class FastCamera:
+    """
+    Decodes into a preallocated ring of frame buffers and publishes each
+    frame with an id and capture timestamp. Consumers block in
+    `wait_for_next(after_id)` instead of polling, so nothing is inferred twice
+    and no core is burnt spinning while the stream is down.
+    """
+
+    RING_SIZE = 4
+
+    def __init__(self, url):
+        self.url = url
+        self.cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        self.slots = [None] * self.RING_SIZE
+        self.latest_frame = None
+        self.cond = threading.Condition()
+        self.stopped = False
+        # Counters for edge.metrics
+        self.decoded = 0
+        self.dropped = 0  # Decoded but overwritten before any detector read it
+        self.decode_time = 0.0
+        self.fresh = False
+        threading.Thread(target=self.update, daemon=True).start()
+
+    def update(self):
+        frame_id = 0
+        while not self.stopped:
+            slot = (frame_id + 1) % self.RING_SIZE
+            start = time.perf_counter()
+            # Decode straight into the slot's buffer; OpenCV reallocates only if the size changes
+            ret, image = self.cap.read(self.slots[slot])
+            elapsed = time.perf_counter() - start
+            if not ret:
+                time.sleep(0.01)
+                continue
+            self.slots[slot] = image
+            frame_id += 1
+            with self.cond:
+                self.latest_frame = Frame(frame_id, time.time(), image)
+                self.decoded += 1
+                self.decode_time += elapsed
+                if self.fresh:
+                    self.dropped += 1
+                self.fresh = True
+                self.cond.notify_all()
+
+    def latest(self):
+        """Most recent Frame, or None before the first capture"""
+        with self.cond:
+            self.fresh = False
+            return self.latest_frame
+
+    def wait_for_next(self, after_id=0, timeout=None):
+        """Block until a frame newer than `after_id` exists; None on timeout or stop"""
+        with self.cond:
+            ready = self.cond.wait_for(
+                lambda: self.stopped or (self.latest_frame is not None and self.latest_frame.id > after_id),
+                timeout
+            )
+            if not ready or self.stopped:
+                return None
+            self.fresh = False
+            return self.latest_frame
+
+    def decode(self, frame):
+        """Frames are decoded on capture"""
+        return frame
+
+    def get_frame(self):
+        frame = self.latest()
+        return frame.image if frame is not None else None
+
+    def release(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        self.cap.release()
+
+
+# --- DIRECT MJPEG INGEST ---
+def read_parts(stream, boundary):
+    """Yield the JPEG payloads of a multipart/x-mixed-replace body"""
+    marker = b"--" + boundary.encode()
+    line = stream.readline()
+    while line:
+        while line and not line.strip():  # CRLF between parts
+            line = stream.readline()
+        headers = {}
+        while line and line.strip():  # Boundary line and part headers
+            name, sep, value = line.decode("latin-1").partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+            line = stream.readline()
+        if not line:
+            return
+        length = headers.get("content-length")
+        if length is not None:
+            data = stream.read(int(length))
+            line = stream.readline()
+        else:
+            # No length - the part runs up to the next boundary
+            chunks = []
+            line = stream.readline()
+            while line and not line.startswith(marker):
+                chunks.append(line)
+                line = stream.readline()
+            data = b"".join(chunks).rstrip(b"\r\n")
+        if data:
+            yield data
+
+
+def reduced_flag(shape, min_size):
+    """Smallest IMREAD_REDUCED_* scale that still covers `min_size` (w, h)"""
+    height, width = shape[:2]
+    for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                         (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if width // factor >= min_size[0] and height // factor >= min_size[1]:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+class MjpegCamera:
+    """
+    Reads an MJPEG (multipart/x-mixed-replace) stream such as IP Webcam's
+    `/video` directly. The reader thread only splits the stream into JPEG
+    payloads. `latest()` and `wait_for_next()` hand out those undecoded
+    frames, so a detector can skip one (adaptive rate, autoscaler stride)
+    before paying for it; `decode()` runs once per frame however many
+    detectors share the camera. Decoding uses libjpeg's reduced-scale path
+    (1/2, 1/4, 1/8) down to the smallest size that still covers what the
+    camera's detectors feed their models (see `Detector.input_size`). The
+    stream is reopened with backoff whenever it fails or ends.
+
+    `Frame.image` holds the undecoded JPEG bytes until `decode()`.
+    """
+
+    def __init__(self, url, min_size=config.FRAME_SIZE):
+        self.url = url
+        self.min_size = min_size
+        self.flag = None  # IMREAD_* flag, chosen from the first frame's size
+        self.session = requests.Session()
+        self.latest_frame = None
+        self.current = None  # Last decoded Frame
+        self.cond = threading.Condition()
+        self.decode_lock = threading.Lock()
+        self.stopped = False
+        # Counters for edge.metrics
+        self.received = 0
+        self.decoded = 0
+        self.dropped = 0  # Received but replaced before any detector asked for it
+        self.decode_time = 0.0
+        self.fresh = False
+        self.reconnects = 0
+        threading.Thread(target=self.update, daemon=True).start()
+
+    def update(self):
+        frame_id = 0
+        backoff = 0.5
+        while not self.stopped:
+            try:
+                with self.session.get(self.url, stream=True, timeout=(3, 5)) as response:
+                    response.raise_for_status()
+                    content_type = response.headers.get("Content-Type", "")
+                    _, _, boundary = content_type.partition("boundary=")
+                    if not content_type.startswith("multipart/"):
+                        raise ValueError(f"not an MJPEG stream ({content_type or 'no content type'})")
+                    response.raw.decode_content = True
+                    stream = io.BufferedReader(response.raw, 1 << 16)
+                    backoff = 0.5
+                    for jpeg in read_parts(stream, boundary.strip('"')):
+                        if self.stopped:
+                            break
+                        frame_id += 1
+                        with self.cond:
+                            self.latest_frame = Frame(frame_id, time.time(), jpeg)
+                            self.received += 1
+                            if self.fresh:
+                                self.dropped += 1
+                            self.fresh = True
+                            self.cond.notify_all()
+            except Exception as e:
+                if not self.stopped:
+                    print(f"📷 {self.url}: stream lost ({str(e)[:60]}) - reconnecting in {backoff:.1f}s")
+            if self.stopped:
+                break
+            self.reconnects += 1
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 5.0)
+
+    def require(self, min_size):
+        """Decode at least `min_size` (w, h) from now on - for another detector sharing the stream"""
+        with self.decode_lock:
+            size = (max(self.min_size[0], min_size[0]), max(self.min_size[1], min_size[1]))
+            if size != self.min_size:
+                self.min_size = size
+                self.flag = None  # Re-pick the reduced scale on the next frame
+
+    def decode(self, raw):
+        """Decoded Frame for a received one - each id is decoded at most once"""
+        if raw is None:
+            return None
+        with self.decode_lock:
+            if self.current is not None and self.current.id == raw.id:
+                return self.current
+            start = time.perf_counter()
+            data = np.frombuffer(raw.image, dtype=np.uint8)
+            if self.flag is None:
+                image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+                if image is not None:
+                    self.flag = reduced_flag(image.shape, self.min_size)
+            else:
+                image = cv2.imdecode(data, self.flag)
+            if image is None:
+                return None  # Corrupt JPEG
+            self.decoded += 1
+            self.decode_time += time.perf_counter() - start
+            self.current = Frame(raw.id, raw.timestamp, image)
+            return self.current
+
+    def latest(self):
+        """Most recent undecoded Frame, or None before the first part arrives"""
+        with self.cond:
+            self.fresh = False
+            return self.latest_frame
+
+    def wait_for_next(self, after_id=0, timeout=None):
+        """Block until an undecoded frame newer than `after_id` exists; None on timeout or stop"""
+        with self.cond:
+            ready = self.cond.wait_for(
+                lambda: self.stopped or (self.latest_frame is not None and self.latest_frame.id > after_id),
+                timeout
+            )
+            if not ready or self.stopped:
+                return None
+            self.fresh = False
+            return self.latest_frame
+
+    def get_frame(self):
+        frame = self.decode(self.latest())
+        return frame.image if frame is not None else None
+
+    def release(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        self.session.close()
+
+
+# --- RECORDED CLIPS ---
+def list_clips(path):
+    """Video files at `path` (a single file or a directory), sorted"""
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(VIDEO_EXTENSIONS)
+    )
+
+
+class ClipCamera:
+    """Recorded clip served one frame per call - deterministic, nothing dropped"""
+
+    def __init__(self, path, loop=False):
+        self.url = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.index = 0
+        self.finished = False
+
+    def wait_for_next(self, after_id=0, timeout=None):
+        """Next clip frame, timestamped in video time; None at the end of the clip"""
+        ret, image = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, image = self.cap.read()
+        if not ret:
+            self.finished = True
+            return None
+        self.index += 1
+        return Frame(self.index, self.index / self.fps, image)
+
+    def decode(self, frame):
+        """Frames are decoded on read"""
+        return frame
+
+    def get_frame(self):
+        frame = self.wait_for_next()
+        return frame.image if frame is not None else None
+
+    def release(self):
+        self.cap.release()
+
+
+# --- SHARED DECODERS ---
+_cameras = {}
+_users = {}  # url -> number of open_camera() calls not yet closed
+_cameras_lock = threading.Lock()
+
+
+def open_camera(url, min_size=None):
+    """Return the decoder for `url`, opening it on first use
+
+    `min_size` (w, h) is the smallest decode the caller can work with;
+    MJPEG ingest decodes at the largest size any of its users asked for.
+    """
+    min_size = min_size or config.FRAME_SIZE
+    with _cameras_lock:
+        if url not in _cameras:
+            direct = config.MJPEG_INGEST and url.startswith(("http://", "https://"))
+            _cameras[url] = MjpegCamera(url, min_size) if direct else FastCamera(url)
+        elif isinstance(_cameras[url], MjpegCamera):
+            _cameras[url].require(min_size)
+        _users[url] = _users.get(url, 0) + 1
+        return _cameras[url]
+
+
+def attach_camera(url, cam):
+    """Serve `cam` for `url` from open_camera() - e.g. a decoder running in another process"""
+    with _cameras_lock:
+        _cameras[url] = cam
+        _users.setdefault(url, 0)
+
+
+def close_camera(url):
+    """Drop one user of `url`; the decoder stops when nobody uses it"""
+    with _cameras_lock:
+        _users[url] = _users.get(url, 1) - 1
+        if _users[url] <= 0 and url in _cameras:
+            _cameras.pop(url).release()
+            del _users[url]
+
+
+def release_all():
+    """Stop every shared decoder"""
+    with _cameras_lock:
+        for cam in _cameras.values():
+            cam.release()
+        _cameras.clear()
+        _users.clear()
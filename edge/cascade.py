@@ -0,0 +1,297 @@
+"""
+Two-stage cascade - a tiny "anything present?" classifier in front of YOLO.
+
+The gate is a four-block CNN (~15k parameters) that scores each ROI window
+(or the whole frame) downscaled to GATE_SIZE x GATE_SIZE. YOLO runs only
+when the highest window score reaches the escalation threshold, so empty
+footboards and windows cost a fraction of a millisecond instead of a full
+detector pass. The threshold is biased towards escalating: uncertain frames
+go to YOLO.
+
+The gate's own accuracy is measured on the live stream:
+
+    hit rate   escalated frames on which YOLO then found something
+    miss rate  share of audited rejections on which YOLO found something -
+               every CASCADE_AUDIT-th rejected frame is sent to YOLO anyway
+
+While the tracker follows an object the gate is bypassed, so a person
+already on the footboard is never lost to a gate miss.
+
+Gates are distilled from recorded footage with the detector as the teacher
+and stored next to its weights as `<weights>.gate.pt`; detectors without
+one run YOLO on every frame as before.
+
+Usage:
+    python -m edge.cascade train footboard --clips clips/footboard --stride 5
+    python -m edge.cascade train window --clips clips/window --recall 0.99
+"""
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+from ultralytics.engine.results import Results
+
+from edge import config
+
+GATE_SIZE = 64
+
+
+def gate_path(weights):
+    """Gate checkpoint stored next to the detector weights"""
+    return os.path.splitext(weights)[0] + ".gate.pt"
+
+
+def empty_result(frame, names):
+    """Box-less Results for a frame the gate rejected"""
+    return Results(frame, path="", names=names, boxes=torch.zeros((0, 6)))
+
+
+class GateNet(nn.Module):
+    """Binary presence classifier - returns one logit per input"""
+
+    def __init__(self):
+        super().__init__()
+
+        def block(c_in, c_out):
+            return nn.Sequential(
+                nn.Conv2d(c_in, c_out, 3, padding=1, bias=False),
+                nn.BatchNorm2d(c_out),
+                nn.ReLU(inplace=True),
+                nn.MaxPool2d(2),
+            )
+
+        self.features = nn.Sequential(block(3, 8), block(8, 16), block(16, 32), block(32, 32))
+        self.head = nn.Linear(32, 1)
+
+    def forward(self, x):
+        return self.head(self.features(x).mean((2, 3))).squeeze(1)
+
+
+def windows(frame, roi):
+    """ROI windows (or the whole frame) as (GATE_SIZE, GATE_SIZE, 3) uint8 crops"""
+    crops = roi.crops(frame) if roi is not None else [frame]
+    return [cv2.resize(crop, (GATE_SIZE, GATE_SIZE), interpolation=cv2.INTER_AREA) for crop in crops]
+
+
+def to_tensor(crops):
+    """uint8 NHWC BGR -> float NCHW in [0, 1]"""
+    return torch.from_numpy(np.ascontiguousarray(np.stack(crops))).permute(0, 3, 1, 2).float().div_(255)
+
+
+class PresenceGate:
+    def __init__(self, path, roi=None, threshold=config.CASCADE_THRESHOLD, audit_every=config.CASCADE_AUDIT):
+        checkpoint = torch.load(path, map_location="cpu")
+        self.net = GateNet()
+        self.net.load_state_dict(checkpoint["state_dict"])
+        self.net.eval()
+        self.roi = roi
+        # Calibrated at training time for the target recall unless overridden
+        self.threshold = float(threshold) if threshold is not None else checkpoint["threshold"]
+        self.audit_every = audit_every
+        self.state = None  # "escalated" | "audit" | "rejected" for the frame last checked
+        self.frames = 0
+        self.escalated = 0
+        self.rejected = 0
+        self.audited = 0
+        self.confirmed = 0  # Escalations on which YOLO found something
+        self.misses = 0     # Audited rejections on which YOLO found something
+        self.gate_time = 0.0
+
+    @classmethod
+    def load(cls, weights, roi=None):
+        """Gate for `weights`, or None if none has been trained"""
+        path = gate_path(weights)
+        if not os.path.exists(path):
+            return None
+        print(f"🚦 Cascade gate: {os.path.basename(path)}")
+        return cls(path, roi)
+
+    def score(self, frame):
+        """Highest presence probability over the ROI windows"""
+        with torch.no_grad():
+            return float(torch.sigmoid(self.net(to_tensor(windows(frame, self.roi)))).max())
+
+    def check(self, frame):
+        """Return True if `frame` should go to YOLO"""
+        start = time.perf_counter()
+        score = self.score(frame)
+        self.gate_time += time.perf_counter() - start
+        self.frames += 1
+        if score >= self.threshold:
+            self.state = "escalated"
+            self.escalated += 1
+            return True
+        self.rejected += 1
+        if self.audit_every and self.rejected % self.audit_every == 0:
+            self.state = "audit"
+            return True
+        self.state = "rejected"
+        return False
+
+    def record(self, found):
+        """Feed back whether YOLO found anything on the frame last checked"""
+        if self.state == "escalated":
+            self.confirmed += bool(found)
+        elif self.state == "audit":
+            self.audited += 1
+            self.misses += bool(found)
+        self.state = None
+
+    @property
+    def skip_ratio(self):
+        """Share of gated frames that never reached YOLO"""
+        return (self.rejected - self.audited) / self.frames if self.frames else 0.0
+
+    @property
+    def hit_rate(self):
+        return self.confirmed / self.escalated if self.escalated else 0.0
+
+    @property
+    def miss_rate(self):
+        return self.misses / self.audited if self.audited else 0.0
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "escalated": self.escalated,
+            "rejected": self.rejected,
+            "audited": self.audited,
+            "skip_ratio": round(self.skip_ratio, 4),
+            "hit_rate": round(self.hit_rate, 4),
+            "miss_rate": round(self.miss_rate, 4),
+            "gate_avg_ms": round(1000 * self.gate_time / self.frames, 3) if self.frames else 0.0,
+        }
+
+
+# --- DISTILLATION ---
+def label_footage(det, clips, stride=5, limit=None):
+    """Run the detector over recorded clips; returns gate crops and per-window presence labels"""
+    from edge.engine import DEVICE, USE_HALF, load_model
+
+    det.bind(load_model(det.weights))
+    rects = det.roi.windows if det.roi is not None else [(0, 0, *config.FRAME_SIZE)]
+    crops, labels = [], []
+    for clip in clips:
+        cap = cv2.VideoCapture(clip)
+        index = 0
+        while limit is None or len(crops) < limit:
+            if not cap.grab():
+                break
+            index += 1
+            if index % stride:
+                continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            frame = cv2.resize(frame, config.FRAME_SIZE)
+            results = det.model.predict(
+                det.roi.crops(frame) if det.roi is not None else frame,
+                device=DEVICE, half=USE_HALF, verbose=False, **det.predict_kwargs
+            )
+            result = (det.roi.merge(results, frame, det.predict_kwargs.get("iou", 0.7))
+                      if det.roi is not None else results[0])
+            detections = det.summarize(result)
+            centers = (detections.xyxy[:, :2] + detections.xyxy[:, 2:]) / 2
+            for (x0, y0, x1, y1), crop in zip(rects, windows(frame, det.roi)):
+                inside = (centers[:, 0] >= x0) & (centers[:, 0] < x1) & (centers[:, 1] >= y0) & (centers[:, 1] < y1)
+                crops.append(crop)
+                labels.append(float(inside.any()))
+        cap.release()
+        print(f"🏷️ {os.path.basename(clip)}: {len(crops)} windows labelled, {int(sum(labels))} positive")
+    return np.stack(crops), np.array(labels, dtype=np.float32)
+
+
+def calibrate(probs, labels, recall):
+    """Highest threshold that still escalates `recall` of the positives"""
+    positives = np.sort(probs[labels > 0.5])
+    if not len(positives):
+        return 0.5
+    return float(positives[int(np.floor((1 - recall) * len(positives)))])
+
+
+def train_gate(crops, labels, epochs=15, recall=0.98, batch_size=64, seed=0):
+    """Train a GateNet on teacher labels; returns (checkpoint, validation report)"""
+    rng = np.random.default_rng(seed)
+    torch.manual_seed(seed)
+    order = rng.permutation(len(crops))
+    split = max(1, len(order) // 5)
+    val, train = order[:split], order[split:]
+    x = to_tensor(list(crops))
+    y = torch.from_numpy(labels)
+
+    net = GateNet()
+    optimizer = torch.optim.Adam(net.parameters(), lr=3e-3)
+    positives = float(y[train].sum())
+    pos_weight = torch.tensor((len(train) - positives) / max(positives, 1.0))
+    loss_fn = nn.BCEWithLogitsLoss(pos_weight=pos_weight)  # Empty frames dominate recorded footage
+
+    for epoch in range(epochs):
+        net.train()
+        total = 0.0
+        for start in range(0, len(train), batch_size):
+            idx = torch.from_numpy(train[start:start + batch_size])
+            batch = x[idx]
+            flip = torch.rand(len(batch)) < 0.5
+            batch[flip] = batch[flip].flip(3)
+            batch = (batch * torch.empty(len(batch), 1, 1, 1).uniform_(0.7, 1.3)).clamp_(0, 1)
+            loss = loss_fn(net(batch), y[idx])
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total += float(loss) * len(idx)
+        rng.shuffle(train)
+        print(f"  epoch {epoch + 1}/{epochs}: loss {total / len(train):.4f}")
+
+    net.eval()
+    with torch.no_grad():
+        probs = torch.sigmoid(net(x[torch.from_numpy(val)])).numpy()
+    truth = labels[val]
+    threshold = calibrate(probs, truth, recall)
+    escalate = probs >= threshold
+    present = truth > 0.5
+    report = {
+        "samples": int(len(crops)),
+        "validation": int(len(val)),
+        "threshold": round(threshold, 4),
+        "hit_rate": round(float(present[escalate].mean()), 4) if escalate.any() else 0.0,
+        "miss_rate": round(float((~escalate[present]).mean()), 4) if present.any() else 0.0,
+        "skip_ratio": round(float((~escalate).mean()), 4),
+    }
+    checkpoint = {"state_dict": net.state_dict(), "input_size": GATE_SIZE, "threshold": threshold, "report": report}
+    return checkpoint, report
+
+
+if __name__ == "__main__":
+    from edge.camera import list_clips
+    from edge.engine import build_detectors
+    from edge.sensors import FixedSpeed
+
+    parser = argparse.ArgumentParser(description="Cascade gate tooling")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="Distill a gate from recorded footage")
+    train.add_argument("detector", choices=["footboard", "window", "driver"])
+    train.add_argument("--clips", required=True, help="Recorded clip or directory of clips")
+    train.add_argument("--stride", type=int, default=5, help="Label every Nth frame")
+    train.add_argument("--limit", type=int, help="Stop after this many labelled windows")
+    train.add_argument("--epochs", type=int, default=15)
+    train.add_argument("--recall", type=float, default=0.98, help="Share of positives the gate must escalate")
+    train.add_argument("-o", "--output", help="Checkpoint path (default: next to the detector weights)")
+    args = parser.parse_args()
+
+    det = build_detectors([args.detector], speed_tracker=FixedSpeed(0.0), adaptive=False, record=False)[0]
+    clips = list_clips(args.clips)
+    if not clips:
+        raise SystemExit(f"No video files found in {args.clips}")
+    crops, labels = label_footage(det, clips, args.stride, args.limit)
+    if labels.min() == labels.max():
+        raise SystemExit("Footage needs both empty and occupied frames to train a gate")
+    checkpoint, report = train_gate(crops, labels, args.epochs, args.recall)
+    output = args.output or gate_path(det.weights)
+    torch.save(checkpoint, output)
+    print(f"✓ Gate saved to {output}")
+    print(f"  threshold {report['threshold']}  hit rate {report['hit_rate']:.1%}  "
+          f"miss rate {report['miss_rate']:.1%}  skipped {report['skip_ratio']:.1%} (validation)")
@@ -0,0 +1,165 @@
+"""
+Edge runtime configuration - every value can be overridden via environment.
+"""
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --- IP CAMERA CONFIGURATION ---
+PHONE_IP = os.environ.get("PHONE_IP", "192.168.1.100:8080")
+VIDEO_URL = f"http://{PHONE_IP}/video"
+SENSOR_URL = f"http://{PHONE_IP}/sensors.json"
+
+# --- SERVER CONFIGURATION ---
+SERVER_BASE = os.environ.get("SERVER_BASE", "http://localhost:5000")
+DRIVER_ID = os.environ.get("DRIVER_ID", "8c394627-e397-4bd5-928f-4cc66cfebac1")
+
+# --- GPS SPEED FEED ---
+SPEED_POLL_INTERVAL = float(os.environ.get("SPEED_POLL_INTERVAL", "0.2"))
+SPEED_STALE_AFTER = float(os.environ.get("SPEED_STALE_AFTER", "2"))  # Seconds without a sample before speed is unknown
+SPEED_EXTRAPOLATE_MAX = 1.0  # Never project the last trend further than this (seconds)
+
+# --- DETECTOR CONFIGURATION ---
+# Each detector keeps its own weights, camera and server endpoint.
+# Cameras with the same URL share one decoder.
+DETECTORS = {
+    "footboard": {
+        "weights": os.path.join(ROOT_DIR, "footboard safety", "best.pt"),
+        "video_url": os.environ.get("FOOTBOARD_VIDEO_URL", VIDEO_URL),
+        "roi": os.environ.get("FOOTBOARD_ROI", ""),  # Polygons to infer on, see edge/roi.py ("" = full frame)
+        "roi_tiles": int(os.environ.get("FOOTBOARD_ROI_TILES", "1")),
+        "server_url": f"{SERVER_BASE}/api/safety",
+    },
+    "window": {
+        "weights": os.path.join(ROOT_DIR, "window safety", "kasun_model.pt"),
+        "video_url": os.environ.get("WINDOW_VIDEO_URL", VIDEO_URL),
+        "roi": os.environ.get("WINDOW_ROI", ""),  # Polygons to infer on, see edge/roi.py ("" = full frame)
+        "roi_tiles": int(os.environ.get("WINDOW_ROI_TILES", "1")),
+        "server_url": f"{SERVER_BASE}/api/window-safety",
+    },
+    "driver": {
+        "weights": os.path.join(ROOT_DIR, "Driver monitering", "Driver_monitering_V2.pt"),
+        "video_url": os.environ.get("DRIVER_VIDEO_URL", VIDEO_URL),
+        "roi": os.environ.get("DRIVER_ROI", ""),  # Polygons to infer on, see edge/roi.py ("" = full frame)
+        "roi_tiles": int(os.environ.get("DRIVER_ROI_TILES", "1")),
+        "server_url": f"{SERVER_BASE}/api/driver-monitor",
+    },
+}
+
+FRAME_SIZE = (640, 480)  # Every detector works on 640x480 frames
+
+# --- CAMERA INGEST ---
+# Parse HTTP MJPEG streams (IP Webcam /video) directly and decode only the
+# frames that are inferred, at reduced JPEG scale. 0 = decode via FFmpeg.
+MJPEG_INGEST = os.environ.get("MJPEG_INGEST", "1") == "1"
+
+# --- PIPELINE MODE ---
+# Decoder processes feed inference through shared memory (edge/pipeline.py)
+PIPELINE_SLOTS = int(os.environ.get("PIPELINE_SLOTS", "4"))  # Frames buffered per camera
+PIPELINE_POLICY = os.environ.get("PIPELINE_POLICY", "drop_oldest")  # drop_oldest | block
+
+# --- DISPLAY ---
+# Headless units skip annotation and cv2.imshow entirely
+HEADLESS = os.environ.get("HEADLESS", "0") == "1"
+PREVIEW_PORT = int(os.environ.get("PREVIEW_PORT", "0"))  # MJPEG preview, 0 = off
+PREVIEW_HOST = os.environ.get("PREVIEW_HOST", "127.0.0.1")  # No auth - set 0.0.0.0 only on a trusted network
+PREVIEW_FPS = float(os.environ.get("PREVIEW_FPS", "5"))
+
+# --- METRICS ---
+# Per-stage timers are only collected when one of these is set
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))  # Prometheus text endpoint, 0 = off
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")  # No auth - set 0.0.0.0 only on a trusted network
+METRICS_FILE = os.environ.get("METRICS_FILE", "")  # Rolling JSONL snapshots, "" = off
+METRICS_INTERVAL = float(os.environ.get("METRICS_INTERVAL", "10"))  # Seconds between JSONL snapshots
+
+# --- HEARTBEAT ---
+HEARTBEAT_URL = f"{SERVER_BASE}/api/heartbeat"  # One request per bus for all detectors
+HEARTBEAT_INTERVAL = 5  # Seconds between heartbeats
+HEARTBEAT_JITTER = 0.2  # +/- fraction of the interval, spreads the fleet
+
+# --- DETECTION DAEMON ---
+# Control API of the resident warm-start daemon (edge/daemon.py) - local only by default
+DAEMON_HOST = os.environ.get("DAEMON_HOST", "127.0.0.1")
+DAEMON_PORT = int(os.environ.get("DAEMON_PORT", "8765"))
+
+# --- INFERENCE BACKEND ---
+# auto = use an exported ONNX/OpenVINO artifact when present (see edge/export.py)
+BACKEND = os.environ.get("BACKEND", "auto")  # auto | pt | onnx | openvino
+
+# --- TRACKING ---
+# Run YOLO on every KEYFRAME_INTERVAL-th frame and carry tracked boxes in
+# between; tracked detectors alert once per object (edge/tracking.py)
+TRACKING = os.environ.get("TRACKING", "1") == "1"
+KEYFRAME_INTERVAL = int(os.environ.get("KEYFRAME_INTERVAL", "3"))
+TRACK_IOU = 0.3  # Minimum IoU to continue a track
+TRACK_MAX_MISSES = 3  # Keyframes a track survives without a match
+
+# --- CASCADE GATE ---
+# A tiny presence classifier decides whether YOLO runs at all; needs a
+# `<weights>.gate.pt` trained with `python -m edge.cascade train` (edge/cascade.py)
+CASCADE = os.environ.get("CASCADE", "1") == "1"
+CASCADE_THRESHOLD = os.environ.get("CASCADE_THRESHOLD")  # Escalation threshold, unset = the gate's calibrated one
+CASCADE_AUDIT = int(os.environ.get("CASCADE_AUDIT", "20"))  # Every Nth rejected frame still goes to YOLO
+
+# --- FPS AUTOSCALER ---
+# Trade imgsz, then frame stride, for a per-detector target FPS (edge/autoscale.py) - opt-in,
+# it lowers accuracy on hardware that cannot hold AUTOSCALE_FPS
+AUTOSCALE = os.environ.get("AUTOSCALE", "0") == "1"
+AUTOSCALE_FPS = float(os.environ.get("AUTOSCALE_FPS", "10"))
+AUTOSCALE_MIN_IMGSZ = int(os.environ.get("AUTOSCALE_MIN_IMGSZ", "224"))
+AUTOSCALE_MAX_STRIDE = int(os.environ.get("AUTOSCALE_MAX_STRIDE", "4"))
+AUTOSCALE_INTERVAL = 2.0  # Seconds between adjustments
+
+# --- EVIDENCE CLIPS ---
+# Keep the last seconds of every camera as JPEGs and save them around
+# CRITICAL/DANGER alerts (edge/recorder.py)
+RECORD_CLIPS = os.environ.get("RECORD_CLIPS", "1") == "1"
+RECORD_SEVERITIES = ("CRITICAL", "DANGER")
+RECORD_PRE_ROLL = float(os.environ.get("RECORD_PRE_ROLL", "10"))  # Seconds kept before an alert
+RECORD_POST_ROLL = float(os.environ.get("RECORD_POST_ROLL", "3"))  # Seconds recorded after it
+RECORD_MAX_CLIP = float(os.environ.get("RECORD_MAX_CLIP", "60"))  # Longest clip in seconds; longer alerts are split
+RECORD_FPS = float(os.environ.get("RECORD_FPS", "10"))
+RECORD_MAX_MB = float(os.environ.get("RECORD_MAX_MB", "8"))  # Pre-roll memory cap per detector
+RECORD_QUALITY = 70
+RECORD_FORMAT = os.environ.get("RECORD_FORMAT", "mjpeg")  # mjpeg | mp4
+RECORD_DIR = os.environ.get("RECORD_DIR", os.path.join(ROOT_DIR, ".clips"))
+RECORD_KEEP = 200  # Newest clips kept per detector
+
+# --- ADAPTIVE INFERENCE RATE ---
+# Suspend inference while the server reports the system disabled, and drop
+# to STATIONARY_FPS while the bus stands still. Only detectors listed in
+# STATIONARY_IDLE idle: footboard and window alerts hinge on the bus moving,
+# but a driver stopped in traffic with the engine running can still be on the
+# phone or nodding off, so the driver monitor keeps its full rate by default.
+ADAPTIVE_RATE = os.environ.get("ADAPTIVE_RATE", "1") == "1"
+STATIONARY_IDLE = [name for name in os.environ.get("STATIONARY_IDLE", "footboard,window").split(",") if name]
+STATIONARY_FPS = float(os.environ.get("STATIONARY_FPS", "2"))
+MOVING_KMH = float(os.environ.get("MOVING_KMH", "5.0"))  # Same threshold as the footboard CRITICAL rule
+DETECTION_HOLD = float(os.environ.get("DETECTION_HOLD", "3"))  # Seconds at full rate after a detection
+
+# --- ALERT DISPATCH ---
+ALERT_QUEUE_SIZE = int(os.environ.get("ALERT_QUEUE_SIZE", "256"))  # Pending alerts before drop/merge
+ALERT_RETRIES = int(os.environ.get("ALERT_RETRIES", "3"))
+ALERT_BACKOFF = float(os.environ.get("ALERT_BACKOFF", "0.5"))  # Seconds, doubled per retry
+
+# --- ALERT BATCHING ---
+# Alerts go to `<endpoint>/alerts/batch` as gzip-compressed batches numbered
+# for idempotent retries; servers without the bulk endpoint get one POST per alert
+ALERT_BATCH = os.environ.get("ALERT_BATCH", "1") == "1"
+ALERT_BATCH_SIZE = int(os.environ.get("ALERT_BATCH_SIZE", "100"))  # Alerts per upload (server takes up to 500)
+ALERT_BATCH_WAIT = float(os.environ.get("ALERT_BATCH_WAIT", "0.5"))  # Seconds a WARNING may wait; CRITICAL/DANGER go at once
+
+# --- ALERT SPOOL ---
+# Undeliverable alerts are kept on disk and replayed when the server is back
+SPOOL_ENABLED = os.environ.get("SPOOL_ENABLED", "1") == "1"
+SPOOL_PATH = os.environ.get("SPOOL_PATH", os.path.join(ROOT_DIR, ".spool", "alerts.db"))
+SPOOL_MAX_ROWS = int(os.environ.get("SPOOL_MAX_ROWS", "50000"))  # Bounds disk use (~25 MB)
+SPOOL_FLUSH_INTERVAL = float(os.environ.get("SPOOL_FLUSH_INTERVAL", "0.5"))  # Seconds per fsync batch
+SPOOL_REPLAY_INTERVAL = float(os.environ.get("SPOOL_REPLAY_INTERVAL", "10"))  # Seconds between reconnect probes
+SPOOL_MAX_ATTEMPTS = int(os.environ.get("SPOOL_MAX_ATTEMPTS", "5"))  # Replay passes before a failing alert is dead-lettered
+
+# --- MOTION GATE ---
+# Footboard and window frames skip YOLO while the scene is static
+MOTION_GATE = os.environ.get("MOTION_GATE", "1") == "1"
+MOTION_THRESHOLD = float(os.environ.get("MOTION_THRESHOLD", "0.01"))  # Fraction of pixels changed
+MOTION_REFRESH = float(os.environ.get("MOTION_REFRESH", "2.0"))  # Forced inference every N seconds
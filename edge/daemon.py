@@ -0,0 +1,258 @@
+"""
+Resident warm-start detection daemon.
+
+Spawning a fresh interpreter per "start" pays for importing torch and
+ultralytics, loading and fusing the weights and the first (slow) inference
+every time. The daemon does all of that once at boot: every detector's model
+is loaded and run on a blank frame, so starting a driver's session only
+opens the camera and the first real inference follows within a frame.
+
+Usage:
+    python -m edge.daemon          # control API on DAEMON_HOST:DAEMON_PORT (127.0.0.1:8765)
+
+Control API (JSON):
+    POST /start    {"driver_id": "...", "detectors": ["footboard"], "video_url": "...", "wait": true}
+    POST /stop     {"driver_id": "...", "detectors": ["footboard"]}   (no detectors = all)
+    GET  /status   ?driver_id=...  every session with its time-to-first-inference
+
+With "wait": true, /start returns once every started detector has run its
+first inference (or after 10 s), so the reply carries the measured
+time-to-first-inference.
+
+All sessions of one driver share a bus: one heartbeat agent reports every
+running detector and one GPS speed source feeds them, as in a single engine.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from edge import config
+from edge.detectors import DriverDetector, FootboardDetector, WindowDetector
+from edge.dispatch import stop_dispatcher
+from edge.engine import DETECTOR_NAMES, Engine, build_detectors, exit_on_sigterm, load_model, predict
+from edge.heartbeat import HeartbeatAgent
+from edge.sensors import SpeedTracker
+
+DETECTOR_CLASSES = {cls.name: cls for cls in (FootboardDetector, WindowDetector, DriverDetector)}
+START_WAIT = 10.0  # Seconds /start waits for the first inference when asked to
+
+
+def warm_up(names):
+    """Load every model and run it once so no session pays the cold start"""
+    timings = {}
+    blank = np.zeros((config.FRAME_SIZE[1], config.FRAME_SIZE[0], 3), dtype=np.uint8)
+    for name in names:
+        start = time.perf_counter()
+        weights = config.DETECTORS[name]["weights"]
+        load_model(weights)
+        loaded = time.perf_counter()
+        predict(weights, blank, **DETECTOR_CLASSES[name].predict_kwargs)
+        timings[name] = {"load_s": round(loaded - start, 2), "warmup_s": round(time.perf_counter() - loaded, 2)}
+        print(f"🔥 {name}: loaded in {timings[name]['load_s']}s, warmed up in {timings[name]['warmup_s']}s")
+    return timings
+
+
+class Bus:
+    """Services shared by every session of one driver - one heartbeat, one speed source"""
+
+    def __init__(self, driver_id):
+        self.heartbeat = HeartbeatAgent(driver_id, []).start()
+        self.speed = None  # SpeedTracker, started by the first session that needs one
+        self.sessions = []
+
+    def speed_tracker(self, name):
+        if self.speed is None and (config.ADAPTIVE_RATE or name == "footboard"):
+            self.speed = SpeedTracker(config.SENSOR_URL)
+        return self.speed
+
+    def add(self, session):
+        self.sessions.append(session)
+        self.heartbeat.detectors = [det for s in self.sessions for det in s.detectors]
+
+    def remove(self, session):
+        if session in self.sessions:
+            self.sessions.remove(session)
+        self.heartbeat.detectors = [det for s in self.sessions for det in s.detectors]
+
+    def stop(self):
+        self.heartbeat.stopped = True
+        if self.speed is not None:
+            self.speed.stop()
+
+
+class Session:
+    """One detector running for one driver on its own engine thread"""
+
+    def __init__(self, driver_id, name, bus, video_url=None):
+        self.driver_id = driver_id
+        self.name = name
+        self.requested = time.time()
+        self.detectors = build_detectors([name], driver_id=driver_id, video_url=video_url,
+                                         speed_tracker=bus.speed_tracker(name))
+        # The bus heartbeat reports this session, so the engine sends none of its own
+        self.engine = Engine(self.detectors, headless=True, preview_port=0, instrument=False, send_heartbeats=False)
+        self.engine.start()
+        self.thread = threading.Thread(target=self.engine.run, daemon=True)
+        self.thread.start()
+
+    @property
+    def time_to_first_inference(self):
+        first = self.detectors[0].first_inference
+        return round(first - self.requested, 3) if first is not None else None
+
+    def stop(self):
+        self.engine.stopped = True
+        self.thread.join(timeout=5)
+
+    def status(self):
+        det = self.detectors[0]
+        return {
+            "driver_id": self.driver_id,
+            "detector": self.name,
+            "running": self.thread.is_alive(),
+            "uptime": round(time.time() - self.requested, 1),
+            "frames": det.frame_id,
+            "time_to_first_inference": self.time_to_first_inference,
+        }
+
+
+class DetectionDaemon:
+    def __init__(self, names=DETECTOR_NAMES):
+        self.names = names
+        self.sessions = {}  # (driver_id, detector) -> Session
+        self.buses = {}  # driver_id -> Bus
+        self.starting = set()  # (driver_id, detector) keys whose Session is being built outside the lock
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.warmup = warm_up(names)
+
+    def start(self, driver_id, names=None, video_url=None, wait=False):
+        names = names or list(self.names)
+        unknown = [name for name in names if name not in self.names]
+        if unknown:
+            raise ValueError(f"Unknown detector(s): {', '.join(unknown)}")
+        started = []
+        with self.lock:
+            bus = self.buses.get(driver_id)
+            if bus is None:
+                bus = self.buses[driver_id] = Bus(driver_id)
+            for name in names:
+                key = (driver_id, name)
+                session = self.sessions.get(key)
+                if key in self.starting or (session is not None and session.thread.is_alive()):
+                    continue
+                if session is not None:
+                    bus.remove(self.sessions.pop(key))  # Engine thread died - replace it
+                self.starting.add(key)
+                started.append(name)
+        # Opening the camera can take seconds - keep the lock free for /status and /stop meanwhile
+        try:
+            for name in started:
+                session = Session(driver_id, name, bus, video_url)
+                with self.lock:
+                    self.sessions[(driver_id, name)] = session
+                    self.starting.discard((driver_id, name))
+                    bus.add(session)
+                print(f"▶️ {name} started for driver {driver_id}")
+        finally:
+            with self.lock:
+                self.starting -= {(driver_id, name) for name in started}
+                self.release_bus(driver_id)
+        with self.lock:
+            sessions = [self.sessions[(driver_id, name)] for name in names if (driver_id, name) in self.sessions]
+        if wait:
+            deadline = time.time() + START_WAIT
+            while time.time() < deadline and any(s.time_to_first_inference is None for s in sessions):
+                time.sleep(0.01)
+        return {"started": started, "sessions": [s.status() for s in sessions]}
+
+    def stop(self, driver_id, names=None):
+        with self.lock:
+            keys = [key for key in self.sessions if key[0] == driver_id and (not names or key[1] in names)]
+            sessions = [self.sessions.pop(key) for key in keys]
+        for session in sessions:
+            session.stop()
+            print(f"⏹️ {session.name} stopped for driver {driver_id}")
+        with self.lock:
+            bus = self.buses.get(driver_id)
+            if bus is not None:
+                for session in sessions:
+                    bus.remove(session)
+            self.release_bus(driver_id)
+        return {"stopped": [session.name for session in sessions]}
+
+    def release_bus(self, driver_id):
+        """Stop a driver's bus services once no session runs or starts on it (caller holds `lock`)"""
+        bus = self.buses.get(driver_id)
+        if bus is not None and not bus.sessions and not any(key[0] == driver_id for key in self.starting):
+            self.buses.pop(driver_id).stop()
+
+    def status(self, driver_id=None):
+        with self.lock:
+            sessions = [s for s in self.sessions.values() if driver_id is None or s.driver_id == driver_id]
+        return {
+            "uptime": round(time.time() - self.started, 1),
+            "warmup": self.warmup,
+            "sessions": [s.status() for s in sessions],
+        }
+
+    def serve(self, host=config.DAEMON_HOST, port=config.DAEMON_PORT):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.rstrip("/") != "/status":
+                    return self.reply(404, {"error": "not found"})
+                driver_id = parse_qs(url.query).get("driver_id", [None])[0]
+                self.reply(200, daemon.status(driver_id))
+
+            def do_POST(self):
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                    driver_id = body.get("driver_id")
+                    if not driver_id:
+                        return self.reply(400, {"error": "driver_id is required"})
+                    action = self.path.rstrip("/")
+                    if action == "/start":
+                        result = daemon.start(driver_id, body.get("detectors"), body.get("video_url"),
+                                              bool(body.get("wait")))
+                    elif action == "/stop":
+                        result = daemon.stop(driver_id, body.get("detectors"))
+                    else:
+                        return self.reply(404, {"error": "not found"})
+                except (ValueError, TypeError) as e:
+                    return self.reply(400, {"error": str(e)})
+                self.reply(200, {"success": True, **result})
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        httpd.daemon_threads = True
+        exit_on_sigterm()
+        print(f"🛰️ Detection daemon ready on http://{host}:{port}")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        for driver_id in {s.driver_id for s in list(self.sessions.values())}:
+            self.stop(driver_id)
+        stop_dispatcher()  # After the sessions, so their last alerts are queued
+        print("\nDaemon Stopped.")
+
+
+if __name__ == "__main__":
+    DetectionDaemon().serve()
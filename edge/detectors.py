@@ -0,0 +1,430 @@
+"""
+Alert logic for the footboard, window and driver detectors.
+
+Each detector turns one frame's Detections (see `edge.postprocess`) into
+alerts for its own server endpoint and draws its own overlay. Model loading, cameras and scheduling live in
+`edge.engine`.
+"""
+import math
+import time
+from datetime import datetime
+
+import cv2
+
+import numpy as np
+
+from edge import config, postprocess
+from edge.cascade import PresenceGate
+from edge.dispatch import get_dispatcher
+from edge.motion import MotionGate
+from edge.roi import RegionOfInterest
+from edge.tracking import Tracker
+
+
+class Detector:
+    """Base class - one YOLO model, one camera, one server endpoint"""
+
+    name = None
+    title = None
+    predict_kwargs = {}
+    motion_gated = False  # Reuse the last result while the scene is static
+    tracked = False  # Infer on keyframes only and alert once per tracked object
+    cascaded = False  # Ask the presence gate before running YOLO, if one is trained
+    CLASS_THRESHOLDS = {}  # Per-label confidence thresholds applied after NMS
+    DEFAULT_THRESHOLD = None  # Defaults to predict_kwargs["conf"]
+
+    def __init__(self, server_url=None, driver_id=config.DRIVER_ID, video_url=None):
+        settings = config.DETECTORS[self.name]
+        self.weights = settings["weights"]
+        self.video_url = video_url or settings["video_url"]
+        self.server_url = server_url or settings["server_url"]
+        self.roi = RegionOfInterest.from_config(settings.get("roi"), settings.get("roi_tiles", 1))
+        self.driver_id = driver_id
+        self.model = None
+        self.frame_id = 0  # Id of the last camera frame processed
+        self.clock = time.time  # Video time in offline replay
+        self.last_result = None
+        self.last_detections = None
+        self.first_inference = None  # time.time() of the first model call, for warm-start reporting
+        self.thresholds = None
+        self.motion_gate = MotionGate(roi=self.roi) if self.motion_gated and config.MOTION_GATE else None
+        self.rate = None  # AdaptiveRate, attached by build_detectors
+        self.tracker = Tracker() if self.tracked and config.TRACKING else None
+        self.cascade = PresenceGate.load(self.weights, self.roi) if self.cascaded and config.CASCADE else None
+        self.recorder = None  # ClipRecorder, attached by build_detectors
+        self.autoscale = None  # Autoscaler, attached by Engine.start
+
+    def bind(self, model):
+        """Attach a loaded model and precompile its class tables"""
+        self.model = model
+        default = self.DEFAULT_THRESHOLD or self.predict_kwargs.get("conf", 0.25)
+        self.thresholds = postprocess.compile_thresholds(model.names, default, self.CLASS_THRESHOLDS)
+        self.compile(model.names)
+
+    def compile(self, names):
+        """Build per-class lookup arrays for the alert logic"""
+
+    def input_size(self, frame_size=config.FRAME_SIZE):
+        """Smallest (w, h) camera decode that still feeds every model input at full `imgsz`
+
+        Each ROI window (or the whole frame) is letterboxed to imgsz on its
+        own, so the smallest window sets how much of FRAME_SIZE is needed.
+        """
+        imgsz = self.predict_kwargs.get("imgsz", 640)
+        windows = self.roi.windows if self.roi is not None else [(0, 0, *frame_size)]
+        longest = min(max(x1 - x0, y1 - y0) for x0, y0, x1, y1 in windows)
+        scale = min(1.0, imgsz / longest)
+        return math.ceil(frame_size[0] * scale), math.ceil(frame_size[1] * scale)
+
+    def summarize(self, result):
+        """Reduce a YOLO result to this detector's Detections"""
+        return postprocess.summarize(result, self.thresholds)
+
+    def reuse_last(self, frame):
+        """True if the motion gate lets `frame` reuse the previous result"""
+        if self.motion_gate is None:
+            return False
+        changed = self.motion_gate.check(frame, self.clock())
+        return self.last_result is not None and not changed
+
+    def gate_rejects(self, frame):
+        """True if the cascade gate finds `frame` empty, so YOLO can be skipped"""
+        if self.cascade is None or (self.tracker is not None and self.tracker.tracks):
+            return False  # No gate, or an object is already being tracked
+        return not self.cascade.check(frame)
+
+    def post_alert(self, payload):
+        """Queue one alert payload for this detector's endpoint - never blocks"""
+        severity = payload.get("status") or payload.get("severity")
+        if self.recorder is not None and severity in config.RECORD_SEVERITIES:
+            payload["clip"] = self.recorder.trigger(payload.get("alert_type", severity))
+        return get_dispatcher().submit(f"{self.server_url}/alerts", payload)
+
+    def handle(self, detections, frame):
+        """Run alert logic on one frame's Detections"""
+        raise NotImplementedError
+
+    def render(self, result, frame, fps):
+        """Return the annotated frame for display"""
+        raise NotImplementedError
+
+
+# --- FOOTBOARD SAFETY ---
+class FootboardDetector(Detector):
+    name = "footboard"
+    title = "RiyaNeth: AI + GPS Integrated Monitor"
+    predict_kwargs = {
+        "imgsz": 480,       # Good balance of speed/accuracy
+        "conf": 0.25,       # Lower threshold = detect more
+        "iou": 0.45,        # NMS IoU threshold
+    }
+    motion_gated = True
+    tracked = True
+    cascaded = True
+    ALERT_COOLDOWN = 2  # seconds between alerts
+
+    def __init__(self, speed_tracker, **kwargs):
+        super().__init__(**kwargs)
+        self.speed = speed_tracker
+        self.last_alert_time = 0
+        self.overlay_color = (0, 255, 0)
+        self.status_msg = ""
+
+    def send_alert(self, alert_type, status, speed, confidence, message):
+        """Send safety alert to server"""
+        payload = {
+            "driver_id": self.driver_id,
+            "timestamp": datetime.now().isoformat(),
+            "alert_type": alert_type,
+            "status": status,
+            "speed": round(speed, 2),
+            "confidence": round(confidence, 3),
+            "message": message
+        }
+        return self.post_alert(payload)
+
+    def compile(self, names):
+        self.occupied = postprocess.compile_lookup(
+            names, lambda label: label in ['Danger', 'Warning'], dtype=bool)  # Matches training labels
+
+    def alert_due(self, detections, occupied, status, now):
+        """Tracked: some occupying object has not raised `status` yet. Untracked: cooldown elapsed"""
+        if detections.ids is not None:
+            return any([self.tracker.once(track_id, status) for track_id in detections.ids[occupied].tolist()])
+        return now - self.last_alert_time > self.ALERT_COOLDOWN
+
+    def handle(self, detections, frame):
+        occupied = self.occupied[detections.cls]
+        footboard_occupied = bool(occupied.any())
+        class_id, max_confidence = detections.top()
+        detected_class = self.model.names[class_id] if class_id is not None else "Safe"
+
+        # Unsafe condition: Movement > 5km/h while steps are occupied
+        # A stale feed holds the last known speed rather than reporting 0
+        speed_kmh = self.speed.speed_kmh
+        is_moving = speed_kmh > 5.0
+        gps = " [GPS STALE]" if self.speed.stale else ""
+        current_time = self.clock()
+
+        if footboard_occupied and is_moving:
+            self.overlay_color = (0, 0, 255)  # Bright Red
+            self.status_msg = f"!!! CRITICAL DANGER: BUS MOVING ({speed_kmh:.1f} km/h) !!!{gps}"
+            if self.alert_due(detections, occupied, "CRITICAL", current_time):
+                self.send_alert(detected_class, "CRITICAL", speed_kmh, max_confidence, self.status_msg)
+                self.last_alert_time = current_time
+        elif footboard_occupied:
+            self.overlay_color = (0, 255, 255)  # Yellow
+            self.status_msg = f"Warning: Footboard Occupied (Stationary){gps}"
+            if self.alert_due(detections, occupied, "WARNING", current_time):
+                self.send_alert(detected_class, "WARNING", speed_kmh, max_confidence, self.status_msg)
+                self.last_alert_time = current_time
+        else:
+            self.overlay_color = (0, 255, 0)  # Green
+            self.status_msg = f"Safe: Speed {speed_kmh:.1f} km/h{gps}"
+
+    def render(self, result, frame, fps):
+        annotated_frame = result.plot()
+        cv2.rectangle(annotated_frame, (0, 0), (640, 60), self.overlay_color, -1)
+        cv2.putText(annotated_frame, self.status_msg, (15, 40),
+                    cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), 2)
+        cv2.putText(annotated_frame, f"FPS: {int(fps)}", (520, 100),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        return annotated_frame
+
+
+# --- WINDOW SAFETY ---
+class WindowDetector(Detector):
+    name = "window"
+    title = "Window Safety System"
+    predict_kwargs = {
+        "imgsz": 320,       # Smaller = much faster
+        "conf": 0.4,        # Confidence threshold
+    }
+    motion_gated = True
+    tracked = True
+    cascaded = True
+    ALERT_COOLDOWN = 5  # Seconds between alerts for same detection type
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.last_alert_time = {}
+        self.violation = False
+
+    def send_alert(self, alert_type, severity, message, confidence=None, cooldown=True):
+        """Send alert to server with cooldown"""
+        current_time = self.clock()
+
+        # Check cooldown
+        alert_key = f"{alert_type}_{severity}"
+        if cooldown and alert_key in self.last_alert_time:
+            if current_time - self.last_alert_time[alert_key] < self.ALERT_COOLDOWN:
+                return False
+
+        self.last_alert_time[alert_key] = current_time
+
+        payload = {
+            "driver_id": self.driver_id,
+            "alert_type": alert_type,
+            "severity": severity,
+            "message": message
+        }
+        if confidence:
+            payload["confidence"] = confidence
+        return self.post_alert(payload)
+
+    # Alert code per class: (matching substring, alert_type, severity, message)
+    ALERT_RULES = [
+        ("head", "head_detected", "DANGER", "Head detected outside window!"),
+        ("hand", "hand_detected", "WARNING", "Hand detected outside window!"),
+        ("body", "body_detected", "WARNING", "Body detected outside window!"),
+    ]
+
+    def compile(self, names):
+        def code(label):
+            for i, (part, *_) in enumerate(self.ALERT_RULES):
+                if part in label.lower():
+                    return i
+            return len(self.ALERT_RULES)  # unknown_detected
+        self.alert_codes = postprocess.compile_lookup(names, code)
+
+    def handle(self, detections, frame):
+        self.violation = len(detections) > 0
+        if not self.violation:
+            return
+
+        codes = self.alert_codes[detections.cls]
+        tracked = detections.ids is not None
+        if tracked:
+            # Each tracked object alerts once per kind, the first frame it is seen
+            picks = [i for i, (track_id, code) in enumerate(zip(detections.ids.tolist(), codes.tolist()))
+                     if self.tracker.once(track_id, code)]
+        else:
+            # Boxes of one alert kind share a cooldown key, so only the most
+            # confident box per kind can produce an alert this frame
+            picks = []
+            for code in np.unique(codes):
+                idx = np.flatnonzero(codes == code)
+                picks.append(int(idx[detections.conf[idx].argmax()]))
+
+        for i in picks:
+            code = codes[i]
+            confidence = float(detections.conf[i])
+            if code < len(self.ALERT_RULES):
+                _, alert_type, severity, text = self.ALERT_RULES[code]
+                message = f"{text} Confidence: {confidence:.2%}"
+            else:
+                alert_type = "unknown_detected"
+                severity = "WARNING"
+                message = f"{self.model.names[int(detections.cls[i])]} detected! Confidence: {confidence:.2%}"
+
+            self.send_alert(
+                alert_type=alert_type,
+                severity=severity,
+                message=message,
+                confidence=confidence,
+                cooldown=not tracked
+            )
+
+    def render(self, result, frame, fps):
+        annotated_frame = result.plot()
+        if self.violation:
+            cv2.putText(annotated_frame, "!! SAFETY VIOLATION !!", (50, 50),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
+        return annotated_frame
+
+
+# --- DRIVER MONITORING ---
+class DriverDetector(Detector):
+    name = "driver"
+    title = "Driver Monitoring V2.1"
+    predict_kwargs = {
+        "imgsz": 320,       # Smaller = much faster
+        "conf": 0.15,       # Very low base threshold
+        "iou": 0.5,
+        "max_det": 5,       # Limit detections for speed
+    }
+    ALERT_COOLDOWN = 5  # Seconds between alerts for same detection type
+    ALERT_THRESHOLD = 10  # Frames before the red banner is shown
+
+    # Priority order: (trigger classes, alert_type, message, detection_class, frame weight)
+    DANGER_RULES = [
+        (('Drowsy', 'eyes closed'), "drowsy", "Driver appears drowsy! Wake up immediately!",
+         "Drowsy/Eyes Closed", 2, "⚠️ DROWSY - WAKE UP!"),
+        (('phone_use',), "phone_use", "Phone usage detected! Put the phone down!",
+         "Phone Use", 1, "⚠️ PHONE DETECTED!"),
+        (('looking_away',), "looking_away", "Driver looking away from road! Eyes on road!",
+         "Looking Away", 1, "⚠️ EYES ON ROAD!"),
+    ]
+    WARNING_RULES = [
+        ('yawning', "Driver yawning detected. Consider taking a break!", "Yawning"),
+        ('eyes_narrowed', "Driver eyes narrowing - signs of fatigue detected.", "Eyes Narrowed"),
+    ]
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.last_alert_time = {}
+        self.alert_frames = 0
+        self.current_detections = {}
+        self.status_text = "DRIVER ALERT ✓"
+        self.status_color = (0, 255, 0)
+        self.is_warning = False
+
+    def send_alert(self, alert_type, severity, message, confidence=None, detection_class=None, sound=False):
+        """Send alert to server with cooldown"""
+        current_time = self.clock()
+
+        # Check cooldown
+        alert_key = f"{alert_type}_{severity}"
+        if alert_key in self.last_alert_time:
+            if current_time - self.last_alert_time[alert_key] < self.ALERT_COOLDOWN:
+                return False
+
+        self.last_alert_time[alert_key] = current_time
+
+        payload = {
+            "driver_id": self.driver_id,
+            "alert_type": alert_type,
+            "severity": severity,
+            "message": message,
+            "sound": sound
+        }
+        if confidence:
+            payload["confidence"] = confidence
+        if detection_class:
+            payload["detection_class"] = detection_class
+        return self.post_alert(payload)
+
+    # Different thresholds per class (NMS runs at the 0.15 base threshold)
+    CLASS_THRESHOLDS = {'phone_use': 0.15}
+    DEFAULT_THRESHOLD = 0.25
+
+    def compile(self, names):
+        self.labels = np.array([names[i] for i in range(len(names))], dtype=object)
+
+    def handle(self, detections, frame):
+        # format: {'class_name': confidence_score}
+        present = np.flatnonzero(detections.best)
+        current_detections = {self.labels[i]: float(detections.best[i]) for i in present}
+        self.current_detections = current_detections
+
+        # --- PRIORITY LOGIC SYSTEM ---
+        self.status_text = "DRIVER ALERT ✓"
+        self.status_color = (0, 255, 0)  # Green
+        self.is_warning = False
+
+        for classes, alert_type, message, detection_class, weight, text in self.DANGER_RULES:
+            hits = [c for c in classes if c in current_detections]
+            if hits:
+                self.status_text = text
+                self.status_color = (0, 0, 255)  # Red
+                self.alert_frames += weight
+                self.send_alert(
+                    alert_type=alert_type,
+                    severity="DANGER",
+                    message=message,
+                    confidence=current_detections[hits[0]],
+                    detection_class=detection_class,
+                    sound=True
+                )
+                return
+
+        for label, message, detection_class in self.WARNING_RULES:
+            if label in current_detections:
+                self.status_text = "😴 YAWNING - TAKE A BREAK?"
+                self.status_color = (0, 165, 255)  # Orange
+                self.is_warning = True
+                self.send_alert(
+                    alert_type=label,
+                    severity="WARNING",
+                    message=message,
+                    confidence=current_detections[label],
+                    detection_class=detection_class,
+                    sound=False
+                )
+                return
+
+        # Safe State (Reset)
+        self.alert_frames = max(0, self.alert_frames - 1)
+
+    def render(self, result, frame, fps):
+        annotated_frame = result.plot()
+
+        # Determine what to actually display based on the frame buffer
+        show_alert = self.alert_frames >= self.ALERT_THRESHOLD or self.is_warning
+        display_color = self.status_color if show_alert else (0, 255, 0)
+        display_text = self.status_text if show_alert else "DRIVER ALERT ✓"
+
+        cv2.rectangle(annotated_frame, (0, 0), (640, 60), display_color, -1)
+        cv2.putText(annotated_frame, display_text, (10, 40),
+                    cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), 2)
+
+        if self.current_detections:
+            det_str = " | ".join([f"{k}: {int(v*100)}%" for k, v in self.current_detections.items()])
+            cv2.putText(annotated_frame, det_str, (10, 90),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+        cv2.putText(annotated_frame, f"Alert Buffer: {self.alert_frames}/{self.ALERT_THRESHOLD}", (10, 115),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
+        cv2.putText(annotated_frame, f"FPS: {int(fps)}", (550, 90),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        return annotated_frame
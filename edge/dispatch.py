@@ -0,0 +1,471 @@
+"""
+Non-blocking alert dispatcher.
+
+The frame loop only enqueues; a background worker posts alerts over one
+keep-alive `requests.Session`, retrying with exponential backoff. The queue
+is bounded: when it is full, a newer alert replaces a queued one with the
+same key (endpoint + type + severity), otherwise the oldest lowest-severity
+alert is moved to the on-disk spool. Alerts that still fail after retries
+are spooled too and replayed oldest-first once the server answers again.
+
+Alerts for the same endpoint are uploaded together as one gzip-compressed
+JSON batch to `<endpoint>/batch`, flushed once ALERT_BATCH_SIZE alerts are
+queued, the oldest has waited ALERT_BATCH_WAIT seconds, or a CRITICAL/DANGER
+alert arrives. Every alert carries this dispatcher's `source` id and a
+sequence number, so the server skips alerts it already stored when a batch
+is retried or replayed from the spool. Servers without the bulk endpoint
+(404) get one POST per alert; so do servers whose `/batch` keeps answering
+5xx (e.g. the alert sequence migration was not applied) - batching is tried
+again after BATCH_RETRY seconds. A batch rejected with any other 4xx is
+split in halves until the offending alerts are isolated; those are logged
+and counted as dropped, the rest are delivered.
+"""
+import gzip
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from edge import config
+from edge.spool import AlertSpool
+
+BATCH_RETRY = 300  # Seconds before a /batch that kept failing with 5xx is tried again
+
+# Higher wins when the queue has to drop something
+SEVERITY_RANK = {"CRITICAL": 3, "DANGER": 3, "WARNING": 1, "SAFE": 0}
+
+
+def alert_key(url, payload):
+    severity = payload.get("status") or payload.get("severity")
+    return (url, payload.get("driver_id"), payload.get("alert_type"), severity)
+
+
+def alert_rank(payload):
+    return SEVERITY_RANK.get(payload.get("status") or payload.get("severity"), 1)
+
+
+def stamped(item):
+    """The item's payload, timestamped with its submit time if the detector sent none"""
+    payload = item["payload"]
+    if "timestamp" not in payload:
+        payload = dict(payload, timestamp=datetime.fromtimestamp(item["ts"]).isoformat())
+    return payload
+
+
+class AlertDispatcher:
+    def __init__(self, max_queue=config.ALERT_QUEUE_SIZE, max_retries=config.ALERT_RETRIES,
+                 backoff=config.ALERT_BACKOFF, timeout=3, spool=None, batch=config.ALERT_BATCH,
+                 batch_size=config.ALERT_BATCH_SIZE, batch_wait=config.ALERT_BATCH_WAIT):
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.sent = 0
+        self.dropped = 0
+        self.merged = 0
+        self.spooled = 0
+        self.dead_lettered = 0
+        self.posts = 0
+        self.post_time = 0.0
+        self.offline = False  # Server unreachable - spool instead of retrying
+        self.batching = batch and batch_size > 1
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.batches = 0
+        self.batch_errors = 0  # Consecutive 404/5xx answers from /batch
+        self.rebatch_at = None  # When to retry /batch after falling back on 5xx
+        self.source = uuid.uuid4().hex[:12]  # (source, seq) identifies an alert to the server
+        self.seq = itertools.count(1)
+        if spool is None and config.SPOOL_ENABLED:
+            spool = AlertSpool()
+        self.spool = spool
+
+        # One pooled keep-alive connection per host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.thread = threading.Thread(target=self.worker, daemon=True)
+        self.thread.start()
+
+    def submit(self, url, payload):
+        """Queue one alert; never blocks on the network"""
+        with self.cond:
+            payload = dict(payload, source=self.source, seq=next(self.seq))
+            item = {"url": url, "payload": payload, "key": alert_key(url, payload), "ts": time.time()}
+            if len(self.queue) >= self.max_queue and not self._make_room(item):
+                self.spool_item(item)
+                return False
+            self.queue.append(item)
+            self.cond.notify()
+        return True
+
+    def _make_room(self, item):
+        """Merge with or evict a queued alert; False if `item` should be dropped"""
+        for i, queued in enumerate(self.queue):
+            if queued["key"] == item["key"]:
+                del self.queue[i]  # Newer alert of the same kind supersedes it
+                self.merged += 1
+                return True
+
+        victim = min(range(len(self.queue)), key=lambda i: alert_rank(self.queue[i]["payload"]))
+        if alert_rank(self.queue[victim]["payload"]) > alert_rank(item["payload"]):
+            return False
+        self.spool_item(self.queue[victim])
+        del self.queue[victim]
+        return True
+
+    def spool_item(self, item):
+        """Keep an undeliverable alert on disk, or count it dropped"""
+        if self.spool is None:
+            self.dropped += 1
+            return
+        payload = stamped(item)
+        self.spool.append(item["url"], payload, alert_rank(payload), item["ts"])
+        self.spooled += 1
+
+    @property
+    def depth(self):
+        return len(self.queue)
+
+    @property
+    def backlog(self):
+        return len(self.spool) if self.spool is not None else 0
+
+    def post(self, item):
+        start = time.perf_counter()
+        try:
+            response = self.session.post(item["url"], json=item["payload"], timeout=self.timeout)
+        finally:
+            self.posts += 1
+            self.post_time += time.perf_counter() - start
+        if response.status_code >= 500:
+            raise requests.exceptions.HTTPError(f"server error {response.status_code}")
+        return response
+
+    def post_batch(self, url, payloads):
+        """POST alerts for one endpoint as a single gzip-compressed batch"""
+        body = gzip.compress(json.dumps({"alerts": payloads}).encode(), compresslevel=5)
+        start = time.perf_counter()
+        try:
+            response = self.session.post(f"{url}/batch", data=body, timeout=self.timeout, headers={
+                "Content-Type": "application/json", "Content-Encoding": "gzip"
+            })
+        finally:
+            self.posts += 1
+            self.post_time += time.perf_counter() - start
+        return response
+
+    def reachable(self, url):
+        """True if the server answers at all - tells a bad alert apart from a dead link"""
+        parts = urlsplit(url)
+        try:
+            self.session.head(f"{parts.scheme}://{parts.netloc}/", timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            return False
+        return True
+
+    def single_posts(self, status):
+        """/batch is missing or keeps failing - post alerts one by one from now on"""
+        if status == 404:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] ℹ️ No batch alert endpoint - posting alerts one by one")
+        else:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] ⚠️ Alert batch endpoint keeps failing ({status or 'no answer'}) - "
+                  f"posting alerts one by one, retrying batches in {BATCH_RETRY}s")
+            self.rebatch_at = time.time() + BATCH_RETRY
+        self.batching = False
+
+    def batch_unavailable(self, status):
+        """Count a 404/5xx (or no answer) from /batch; True once alerts should go one by one instead"""
+        self.batch_errors += 1
+        if status == 404 or self.batch_errors > self.max_retries:
+            self.single_posts(status)
+            return True
+        return False
+
+    def reject(self, payload, status):
+        """The server refused an alert (4xx) - it can never be delivered, so say which one is lost"""
+        self.dropped += 1
+        severity = payload.get("status") or payload.get("severity")
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Alert rejected ({status}), dropped: "
+              f"{severity} - {payload.get('alert_type')} (seq {payload.get('seq')})")
+
+    def dead_letter(self, payload):
+        """A spooled alert failed SPOOL_MAX_ATTEMPTS replays - it was moved aside so the rest can flow"""
+        self.dead_lettered += 1
+        severity = payload.get("status") or payload.get("severity")
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] ☠️ Alert failed {config.SPOOL_MAX_ATTEMPTS} replays, "
+              f"moved to dead_alerts: {severity} - {payload.get('alert_type')} (seq {payload.get('seq')})")
+
+    def deliver_batch(self, items):
+        """Post one endpoint's alerts as a batch, retrying with backoff; True once the server answered"""
+        if not self.batching:
+            with self.cond:
+                self.queue.extendleft(reversed(items))  # Fell back while splitting - go one by one
+            return True
+        payloads = [stamped(item) for item in items]
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.post_batch(items[0]["url"], payloads)
+            except requests.exceptions.RequestException as e:
+                if attempt == self.max_retries or self.stopped:
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Alert batch error: {str(e)[:50]}")
+                    if self.stopped or not self.reachable(items[0]["url"]):
+                        return False
+                    # The server is up but this upload never lands - go one by one so one alert can't hold the rest
+                    self.single_posts(None)
+                    with self.cond:
+                        self.queue.extendleft(reversed(items))
+                    return True
+                time.sleep(self.backoff * (2 ** attempt))
+                continue
+            status = response.status_code
+            if status == 201:
+                self.batch_errors = 0
+                self.sent += len(items)
+                self.batches += 1
+                severities = ", ".join(sorted({str(p.get("status") or p.get("severity")) for p in payloads}))
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] 🚨 {len(items)} alert(s) sent: {severities}")
+                return True
+            if status == 404 or status >= 500:
+                if self.batch_unavailable(status):
+                    with self.cond:
+                        self.queue.extendleft(reversed(items))
+                    return True
+                if self.stopped:
+                    return False
+                time.sleep(self.backoff * (2 ** attempt))
+                continue
+            # Rejected (400, 413, ...) - split until the offending alerts are isolated
+            if len(items) == 1:
+                self.reject(payloads[0], status)
+                return True
+            half = len(items) // 2
+            return self.deliver_batch(items[:half]) and self.deliver_batch(items[half:])
+        return False
+
+    def deliver(self, item):
+        """Post one alert, retrying with backoff; True once the server answered"""
+        payload = item["payload"]
+        severity = payload.get("status") or payload.get("severity")
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.post(item)
+                if response.status_code == 201:
+                    self.sent += 1
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] 🚨 Alert sent: {severity} - {payload.get('alert_type')}")
+                elif response.status_code >= 400:
+                    self.reject(payload, response.status_code)
+                else:
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] ⚠️ Alert failed: {response.status_code}")
+                return True
+            except requests.exceptions.RequestException as e:
+                if attempt == self.max_retries or self.stopped:
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Alert error: {str(e)[:50]}")
+                    if isinstance(e, requests.exceptions.HTTPError) or not self.stopped and self.reachable(item["url"]):
+                        self.spool_item(item)  # The server is up, only this alert fails - retry it from the spool
+                        return True
+                    return False
+                time.sleep(self.backoff * (2 ** attempt))
+        return False
+
+    def replay_one(self, row_id, url, payload):
+        """Post one spooled alert: True once it can leave the spool, False if it failed, None if offline"""
+        try:
+            response = self.post({"url": url, "payload": payload})
+        except requests.exceptions.HTTPError:
+            pass  # 5xx for this alert - the server itself answered
+        except requests.exceptions.RequestException:
+            if not self.reachable(url):
+                return None
+        else:
+            if response.status_code >= 400:
+                self.reject(payload, response.status_code)
+            return True
+        if self.spool.fail(row_id, config.SPOOL_MAX_ATTEMPTS):
+            self.dead_letter(payload)
+        return False
+
+    def replay(self):
+        """Drain the spool oldest-first while the server answers; False if still offline"""
+        replayed = 0
+        failed = set()  # Rows that failed this pass - retried next pass, dead-lettered after SPOOL_MAX_ATTEMPTS
+        while not self.queue and not self.stopped:  # Live alerts go first
+            limit = self.batch_size if self.batching else 50
+            rows = [row for row in self.spool.oldest(limit + len(failed)) if row[0] not in failed][:limit]
+            if not rows:
+                break
+            done = []
+            try:
+                if self.batching:
+                    by_url = defaultdict(list)
+                    for row_id, _, url, payload in rows:
+                        by_url[url].append((row_id, payload))
+                    for url, group in by_url.items():
+                        try:
+                            status = self.post_batch(url, [payload for _, payload in group]).status_code
+                        except requests.exceptions.RequestException:
+                            if not self.reachable(url):
+                                self.offline = True
+                                return False
+                            status = None  # The server is up but this upload never lands
+                        if status is None or status == 404 or status >= 500:
+                            if not self.batch_unavailable(status):
+                                self.offline = False  # Retried on the next pass; live alerts keep flowing
+                                return True
+                            break  # The rest stays spooled for the next pass, posted one by one
+                        if status == 201:
+                            self.batch_errors = 0
+                            done += [row_id for row_id, _ in group]
+                            continue
+                        # Rejected - find the offending alerts one by one
+                        for row_id, payload in group:
+                            delivered = self.replay_one(row_id, url, payload)
+                            if delivered is None:
+                                self.offline = True
+                                return False
+                            if delivered:
+                                done.append(row_id)
+                            else:
+                                failed.add(row_id)
+                else:
+                    for row_id, _, url, payload in rows:
+                        delivered = self.replay_one(row_id, url, payload)
+                        if delivered is None:
+                            self.offline = True
+                            return False
+                        if delivered:
+                            done.append(row_id)
+                        else:
+                            failed.add(row_id)
+            finally:
+                self.spool.delete(done)
+                replayed += len(done)
+        if replayed:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] 📤 Replayed {replayed} spooled alerts")
+        self.offline = False
+        return True
+
+    def worker(self):
+        last_replay = 0.0
+        while True:
+            if self.rebatch_at is not None and time.time() >= self.rebatch_at:
+                self.batching, self.batch_errors, self.rebatch_at = True, 0, None
+            with self.cond:
+                while not self.queue and not self.stopped:
+                    if self.backlog and time.time() - last_replay >= config.SPOOL_REPLAY_INTERVAL:
+                        break
+                    self.cond.wait(config.SPOOL_REPLAY_INTERVAL)
+                if self.stopped and not self.queue:
+                    return
+                if self.batching:
+                    while self.queue and not self.batch_due():
+                        self.cond.wait(max(0.0, self.queue[0]["ts"] + self.batch_wait - time.time()))
+                if not self.queue:
+                    items = None
+                else:
+                    items = self.take_batch() if self.batching else [self.queue.popleft()]
+
+            if items is None:
+                last_replay = time.time()
+                self.replay()
+            elif self.offline and self.spool is not None:
+                for item in items:
+                    self.spool_item(item)  # Server is down - don't stall the queue on retries
+            elif self.deliver_batch(items) if self.batching else self.deliver(items[0]):
+                last_replay = 0.0  # Server is back - drain any backlog on the next idle pass
+            else:
+                self.offline = True
+                for item in items:
+                    self.spool_item(item)
+
+    def batch_due(self):
+        """True once the queued alerts should be uploaded rather than wait for more"""
+        return (len(self.queue) >= self.batch_size or self.stopped or self.offline
+                or time.time() - self.queue[0]["ts"] >= self.batch_wait
+                or any(alert_rank(item["payload"]) >= 3 for item in self.queue))
+
+    def take_batch(self):
+        """Pop up to batch_size queued alerts bound for the oldest alert's endpoint"""
+        url = self.queue[0]["url"]
+        batch, rest = [], deque()
+        for item in self.queue:
+            (batch if item["url"] == url and len(batch) < self.batch_size else rest).append(item)
+        self.queue = rest
+        return batch
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            # Anything still queued survives the restart on disk
+            while self.queue:
+                self.spool_item(self.queue.popleft())
+            self.cond.notify_all()
+        # An in-flight upload either lands or is spooled - let it finish before the spool closes
+        self.thread.join(timeout=2 * self.timeout + 1)
+        if self.spool is not None:
+            self.spool.close()
+
+
+class RecordingDispatcher:
+    """Collects alerts instead of posting them (benchmarks, offline replay)"""
+
+    depth = 0
+    backlog = 0
+
+    def __init__(self):
+        self.alerts = []
+
+    def submit(self, url, payload):
+        self.alerts.append((time.time(), url, payload))
+        return True
+
+    def stop(self):
+        pass
+
+
+# --- SHARED DISPATCHER ---
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def set_dispatcher(dispatcher):
+    """Replace the process-wide dispatcher, e.g. with a RecordingDispatcher"""
+    global _dispatcher
+    with _dispatcher_lock:
+        _dispatcher = dispatcher
+
+
+def peek_dispatcher():
+    """The shared dispatcher if one was started, else None - never starts one"""
+    with _dispatcher_lock:
+        return _dispatcher
+
+
+def get_dispatcher():
+    """Return the process-wide dispatcher, starting it on first use"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher()
+        return _dispatcher
+
+
+def stop_dispatcher():
+    """Flush and stop the shared dispatcher, if one was started"""
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None:
+        dispatcher.stop()
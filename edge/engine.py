@@ -0,0 +1,325 @@
+"""
+Single-process multi-model engine.
+
+Loads every requested detector's YOLO weights once, shares camera decoders
+between detectors that watch the same stream, and runs inference from one
+scheduler thread so the models never fight each other for CPU cores.
+
+Usage:
+    python -m edge.engine                       # all three detectors
+    python -m edge.engine footboard window      # a subset
+"""
+import argparse
+import os
+import signal
+import threading
+import time
+
+import cv2
+import torch
+from ultralytics import YOLO
+
+from edge import camera, cascade, config, heartbeat, metrics, postprocess, tracking
+from edge.adaptive import AdaptiveRate
+from edge.autoscale import Autoscaler
+from edge.backends import resolve_weights
+from edge.dispatch import stop_dispatcher
+from edge.detectors import DriverDetector, FootboardDetector, WindowDetector
+from edge.preview import PreviewServer
+from edge.recorder import ClipRecorder
+from edge.sensors import SpeedTracker
+
+# --- GPU ACCELERATION ---
+DEVICE = 0 if torch.cuda.is_available() else 'cpu'
+USE_HALF = torch.cuda.is_available()  # FP16 only works on GPU
+
+DETECTOR_NAMES = ("footboard", "window", "driver")
+
+_models = {}
+_predict_locks = {}  # weights -> Lock; an ultralytics predictor must not run on two threads at once
+_models_lock = threading.Lock()
+
+
+def load_model(weights):
+    """Load YOLO weights once per process, preferring an exported CPU artifact"""
+    with _models_lock:
+        if weights not in _models:
+            path = resolve_weights(weights)
+            model = YOLO(path, task="detect")
+            if path.endswith(".pt"):
+                model.fuse()  # Exported graphs are already fused
+            else:
+                print(f"⚡ Using exported model: {os.path.basename(path)}")
+            _models[weights] = model
+            _predict_locks[weights] = threading.Lock()
+        return _models[weights]
+
+
+def predict(weights, inputs, **kwargs):
+    """Run the shared model for `weights` on `inputs`, one thread at a time"""
+    with _predict_locks[weights]:
+        return _models[weights].predict(inputs, device=DEVICE, half=USE_HALF, verbose=False, **kwargs)
+
+
+def build_detectors(names, driver_id=config.DRIVER_ID, video_url=None, sensor_url=config.SENSOR_URL,
+                    speed_tracker=None, adaptive=config.ADAPTIVE_RATE, record=config.RECORD_CLIPS):
+    """Instantiate detectors by name for one bus, sharing sensors between them"""
+    if adaptive or "footboard" in names:
+        speed_tracker = speed_tracker or SpeedTracker(sensor_url)
+
+    detectors = []
+    for name in names:
+        kwargs = {"driver_id": driver_id, "video_url": video_url}
+        if name == "footboard":
+            detectors.append(FootboardDetector(speed_tracker, **kwargs))
+        elif name == "window":
+            detectors.append(WindowDetector(**kwargs))
+        elif name == "driver":
+            detectors.append(DriverDetector(**kwargs))
+        else:
+            raise ValueError(f"Unknown detector: {name}")
+
+    for det in detectors:
+        if adaptive:
+            det.rate = AdaptiveRate(speed_tracker, idle_when_stationary=det.name in config.STATIONARY_IDLE)
+        if record:
+            det.recorder = ClipRecorder(det.name)
+    return detectors
+
+
+# --- PER-FRAME STEPS (shared with edge.batching) ---
+def prepare(det, frame):
+    """Resize a raw frame to the working size and feed the clip recorder"""
+    frame = cv2.resize(frame, config.FRAME_SIZE)
+    if det.recorder is not None:
+        det.recorder.add(frame)
+    return frame
+
+
+def track(det, detections):
+    """Run fresh detections through the tracker and keep them as the latest"""
+    if det.tracker is not None:
+        detections = det.tracker.update(detections)
+    det.last_detections = detections
+    return detections
+
+
+def skip_inference(det, frame, clock=metrics.NULL_CLOCK):
+    """(result, detections) for a frame that needs no YOLO pass, or None
+
+    Static scenes reuse the last result, frames between tracker keyframes
+    follow the tracks and frames the cascade gate rejects come back empty.
+    """
+    reuse = det.reuse_last(frame)
+    clock.lap("motion_gate")
+    if reuse:
+        return det.last_result, det.last_detections
+    if det.tracker is not None and not det.tracker.keyframe_due():
+        det.last_detections = det.tracker.propagate()
+        clock.lap("track")
+        return det.last_result, det.last_detections
+    rejected = det.gate_rejects(frame)
+    if det.cascade is not None:
+        clock.lap("cascade")
+    if not rejected:
+        return None
+    det.last_result = cascade.empty_result(frame, det.model.names)
+    return det.last_result, track(det, postprocess.empty(len(det.thresholds)))
+
+
+def model_inputs(det, frame):
+    """YOLO inputs for one frame - one per ROI window"""
+    return det.roi.crops(frame) if det.roi is not None else [frame]
+
+
+def absorb(det, results, frame):
+    """Merge one frame's YOLO results and update the detector's state"""
+    result = det.last_result = (
+        det.roi.merge(results, frame, det.predict_kwargs.get("iou", 0.7))
+        if det.roi is not None else results[0]
+    )
+    if det.first_inference is None:
+        det.first_inference = time.time()
+    detections = det.summarize(result)
+    if det.cascade is not None:
+        det.cascade.record(len(detections))
+    return result, track(det, detections)
+
+
+def finish(det, detections, frame):
+    """Feed the adaptive rate and run alert logic on a processed frame"""
+    if det.rate is not None:
+        det.rate.observe(detections)
+    det.handle(detections, frame)
+
+
+class Engine:
+    """Round-robin scheduler over detectors sharing one process"""
+
+    def __init__(self, detectors, headless=config.HEADLESS, preview_port=config.PREVIEW_PORT, instrument=True,
+                 autoscale=config.AUTOSCALE, send_heartbeats=True):
+        self.detectors = detectors
+        self.headless = headless
+        self.preview_port = preview_port
+        self.instrument = instrument
+        self.autoscale = autoscale
+        self.send_heartbeats = send_heartbeats  # False when the host runs the bus heartbeat itself (daemon)
+        self.preview = None
+        self.metrics = None
+        self.heartbeats = []
+        self.stopped = False
+        self.prev_time = {det.name: time.time() for det in detectors}
+
+    def start(self):
+        for det in self.detectors:
+            det.bind(load_model(det.weights))
+            det.camera = camera.open_camera(det.video_url, det.input_size())
+            if self.autoscale:
+                fixed = not resolve_weights(det.weights).endswith(".pt")  # Exported graphs have a fixed imgsz
+                det.autoscale = Autoscaler(det, share=len(self.detectors), fixed_imgsz=fixed)
+            print(f"✓ {det.name}: {det.weights} ({len(det.model.names)} classes)")
+        if self.send_heartbeats:
+            self.heartbeats = heartbeat.start(self.detectors)
+        if self.preview_port:
+            self.preview = PreviewServer(self.preview_port, names=[det.name for det in self.detectors])
+        if self.instrument:
+            self.metrics = metrics.start(self.detectors)
+
+    def should_render(self, det):
+        if not self.headless:
+            return True
+        return self.preview is not None and self.preview.wants(det.name)
+
+    def step(self, det, timeout=None):
+        """Run the next unseen frame through one detector; returns the annotated frame if anyone is watching"""
+        frame = det.camera.wait_for_next(det.frame_id, timeout)
+        if frame is None:
+            return None
+        det.frame_id = frame.id
+        if det.rate is not None and not det.rate.should_infer():
+            return None  # Suspended or idling - the frame is consumed unseen
+        if det.autoscale is not None and not det.autoscale.take():
+            return None  # Skipped by the autoscaler's frame stride
+        frame = det.camera.decode(frame)  # Skipped frames are never decoded
+        if frame is None:
+            return None  # Corrupt JPEG
+        return self.process(det, frame.image)
+
+    def process(self, det, frame):
+        """Infer (or reuse) and run alert logic on one raw frame"""
+        clock = self.metrics.clock(det.name) if self.metrics is not None else metrics.NULL_CLOCK
+        frame = prepare(det, frame)
+        clock.lap("resize")
+        shortcut = skip_inference(det, frame, clock)
+        if shortcut is not None:
+            result, detections = shortcut
+        else:
+            start = time.perf_counter()
+            results = predict(det.weights, model_inputs(det, frame), **det.predict_kwargs)
+            if det.autoscale is not None:
+                det.autoscale.observe(time.perf_counter() - start)  # Only frames that ran YOLO
+            clock.lap("predict")
+            result, detections = absorb(det, results, frame)
+        finish(det, detections, frame)
+        clock.lap("postprocess")
+
+        curr_time = time.time()
+        fps = 1 / (curr_time - self.prev_time[det.name] + 0.001)
+        self.prev_time[det.name] = curr_time
+        if not self.should_render(det):
+            return None
+        if det.tracker is not None:
+            result = tracking.as_result(detections, frame, result)  # Tracked boxes on this frame
+        annotated_frame = det.render(result, frame, fps)
+        if det.roi is not None:
+            det.roi.draw(annotated_frame)
+        clock.lap("render")
+        return annotated_frame
+
+    def report(self):
+        """Print motion-gate, cascade and adaptive-rate skip counts"""
+        for det in self.detectors:
+            gate = det.cascade
+            if gate is not None and gate.frames:
+                print(f"📊 {det.name}: cascade skipped {gate.skip_ratio:.0%} of {gate.frames} frames - "
+                      f"hit rate {gate.hit_rate:.0%}, miss rate {gate.miss_rate:.1%} ({gate.audited} audited)")
+            if det.rate is not None and det.rate.skipped:
+                print(f"📊 {det.name}: {det.rate.skipped} frames skipped by adaptive rate ({det.rate.mode})")
+            gate = det.motion_gate
+            if gate is not None:
+                print(f"📊 {det.name}: skipped {gate.skipped}/{gate.total} frames ({gate.skip_ratio:.0%}) - scene static")
+
+    def run(self):
+        report_time = time.time()
+        try:
+            while not self.stopped:
+                progressed = False
+                for det in self.detectors:
+                    before = det.frame_id
+                    annotated_frame = self.step(det, timeout=0)
+                    progressed |= det.frame_id != before
+                    if annotated_frame is None:
+                        continue
+                    if self.preview is not None and self.preview.wants(det.name):
+                        self.preview.publish(det.name, annotated_frame)
+                    if not self.headless:
+                        cv2.imshow(det.title, annotated_frame)
+
+                if not self.headless and cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.stopped = True
+
+                if not progressed:
+                    # Every detector is up to date - sleep until the lead camera delivers
+                    lead = self.detectors[0]
+                    lead.camera.wait_for_next(lead.frame_id, timeout=0.05)
+
+                if time.time() - report_time >= 30:
+                    self.report()
+                    report_time = time.time()
+        except KeyboardInterrupt:
+            self.stopped = True
+
+        self.report()
+        for agent in self.heartbeats:
+            agent.stopped = True
+        for det in self.detectors:
+            camera.close_camera(det.video_url)
+            if det.recorder is not None:
+                det.recorder.close()
+        if self.preview is not None:
+            self.preview.close()
+        if not self.headless:
+            cv2.destroyAllWindows()
+
+
+def exit_on_sigterm():
+    """Give SIGTERM (systemd, docker stop) the same clean shutdown as Ctrl+C"""
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, interrupt)
+
+
+def run(names=DETECTOR_NAMES, headless=config.HEADLESS, preview_port=config.PREVIEW_PORT):
+    """Build, start and run an engine hosting `names`"""
+    exit_on_sigterm()
+    engine = Engine(build_detectors(names), headless=headless, preview_port=preview_port)
+    try:
+        engine.start()
+        print(f"🌐 Server: {config.SERVER_BASE}  |  Camera: {config.PHONE_IP}")
+        print("System Ready! Press Ctrl+C to quit." if engine.headless else "System Ready! Press 'Q' to quit.")
+        print("-" * 60)
+        engine.run()
+    finally:
+        stop_dispatcher()  # Queued alerts go to the spool
+    print("\nSystem Stopped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sisuraksha edge detection engine")
+    parser.add_argument("detectors", nargs="*", default=list(DETECTOR_NAMES),
+                        choices=DETECTOR_NAMES, help="Detectors to host")
+    parser.add_argument("--headless", action="store_true", help="No annotation or display windows")
+    parser.add_argument("--preview-port", type=int, default=config.PREVIEW_PORT,
+                        help="Serve an MJPEG preview on this port (0 = off)")
+    args = parser.parse_args()
+    run(args.detectors, headless=args.headless or config.HEADLESS, preview_port=args.preview_port)
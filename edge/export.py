@@ -0,0 +1,232 @@
+"""
+Export detector weights for fast CPU inference, with optional INT8
+post-training quantization calibrated on recorded bus clips.
+
+Usage:
+    python -m edge.export footboard --format openvino --int8 --clips clips/footboard
+    python -m edge.export all --format onnx --int8 --clips clips/
+
+Each export writes the artifact next to the `.pt` (picked up automatically by
+the engine, see `edge/backends.py`) plus a `<weights>.<backend>.json` report
+with the per-model accuracy delta and latency against the PyTorch original.
+
+Graphs are exported with a dynamic batch axis: the depot scheduler
+(`edge.batching`) and multi-window ROIs hand `predict()` several images at
+once, which a batch-1 graph cannot take.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from edge import config
+from edge.backends import artifact_paths
+from edge.camera import list_clips
+from edge.detectors import DriverDetector, FootboardDetector, WindowDetector
+
+DETECTOR_CLASSES = {cls.name: cls for cls in (FootboardDetector, WindowDetector, DriverDetector)}
+
+
+# --- CALIBRATION DATA ---
+def extract_frames(clips, out_dir, every=15, limit=300):
+    """Sample every Nth frame from recorded clips as 640x480 JPEGs"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for clip in clips:
+        cap = cv2.VideoCapture(clip)
+        index = 0
+        while len(paths) < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % every == 0:
+                path = os.path.join(out_dir, f"{len(paths):05d}.jpg")
+                cv2.imwrite(path, cv2.resize(frame, config.FRAME_SIZE))
+                paths.append(path)
+            index += 1
+        cap.release()
+    return paths
+
+
+def letterbox(frame, imgsz):
+    """Resize + pad to imgsz x imgsz, the way ultralytics preprocesses"""
+    h, w = frame.shape[:2]
+    scale = imgsz / max(h, w)
+    resized = cv2.resize(frame, (round(w * scale), round(h * scale)))
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - resized.shape[0]) // 2
+    left = (imgsz - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    blob = canvas[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+    return np.ascontiguousarray(blob)
+
+
+# --- EXPORTERS ---
+def export_openvino(weights, imgsz, int8, calib_dir, names):
+    model = YOLO(weights)
+    kwargs = {"format": "openvino", "imgsz": imgsz, "dynamic": True}  # Batched predict() calls
+    if int8:
+        # ultralytics calibrates on the dataset's val split (images only)
+        data_yaml = os.path.join(calib_dir, "calib.yaml")
+        with open(data_yaml, "w") as f:
+            json.dump({"path": calib_dir, "train": "images", "val": "images",
+                       "names": [names[i] for i in sorted(names)]}, f)
+        kwargs.update(int8=True, data=data_yaml)
+    exported = model.export(**kwargs)
+
+    target = artifact_paths(weights)["openvino-int8" if int8 else "openvino"]
+    if os.path.abspath(exported) != os.path.abspath(target):
+        shutil.rmtree(target, ignore_errors=True)
+        shutil.move(exported, target)
+    return target
+
+
+def export_onnx(weights, imgsz, int8, frames):
+    model = YOLO(weights)
+    exported = model.export(format="onnx", imgsz=imgsz, simplify=True, dynamic=True)  # Batched predict() calls
+    target = artifact_paths(weights)["onnx"]
+    if os.path.abspath(exported) != os.path.abspath(target):
+        shutil.move(exported, target)
+    if not int8:
+        return target
+
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class ClipReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.input_name = input_name
+            self.frames = iter(frames)
+
+        def get_next(self):
+            path = next(self.frames, None)
+            if path is None:
+                return None
+            return {self.input_name: letterbox(cv2.imread(path), imgsz)}
+
+    import onnxruntime as ort
+    input_name = ort.InferenceSession(target, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    int8_target = artifact_paths(weights)["onnx-int8"]
+    quantize_static(
+        target, int8_target, ClipReader(input_name),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+    return int8_target
+
+
+# --- ACCURACY DELTA ---
+def box_iou(a, b):
+    """IoU matrix between two xyxy arrays"""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def match(reference, candidate, iou_threshold=0.5):
+    """Count candidate boxes agreeing with the reference (same class, IoU >= 0.5)"""
+    ref_cls, ref_xyxy = reference
+    cand_cls, cand_xyxy = candidate
+    if not len(ref_cls) or not len(cand_cls):
+        return 0
+    iou = box_iou(ref_xyxy, cand_xyxy)
+    iou[ref_cls[:, None] != cand_cls[None, :]] = 0
+    matched = 0
+    while iou.size and iou.max() >= iou_threshold:
+        i, j = np.unravel_index(iou.argmax(), iou.shape)
+        iou[i, :] = 0
+        iou[:, j] = 0
+        matched += 1
+    return matched
+
+
+def compare(weights, exported, frames, predict_kwargs):
+    """Agreement and latency of `exported` versus the PyTorch reference"""
+    reference = YOLO(weights)
+    reference.fuse()
+    candidate = YOLO(exported, task="detect")
+
+    def run(model):
+        outputs, latencies = [], []
+        for path in frames:
+            frame = cv2.imread(path)
+            start = time.perf_counter()
+            r = model.predict(frame, device="cpu", verbose=False, **predict_kwargs)[0]
+            latencies.append(time.perf_counter() - start)
+            outputs.append((r.boxes.cls.cpu().numpy(), r.boxes.xyxy.cpu().numpy()))
+        return outputs, latencies
+
+    ref_out, ref_lat = run(reference)
+    cand_out, cand_lat = run(candidate)
+
+    ref_total = sum(len(c) for c, _ in ref_out)
+    cand_total = sum(len(c) for c, _ in cand_out)
+    matched = sum(match(r, c) for r, c in zip(ref_out, cand_out))
+    recall = matched / ref_total if ref_total else 1.0
+    precision = matched / cand_total if cand_total else 1.0
+    return {
+        "frames": len(frames),
+        "reference_boxes": ref_total,
+        "exported_boxes": cand_total,
+        "recall_vs_pt": round(recall, 4),
+        "precision_vs_pt": round(precision, 4),
+        "pt_latency_ms": round(1000 * float(np.median(ref_lat)), 2),
+        "exported_latency_ms": round(1000 * float(np.median(cand_lat)), 2),
+        "speedup": round(float(np.median(ref_lat) / max(np.median(cand_lat), 1e-9)), 2),
+    }
+
+
+def export_detector(name, fmt, int8, clips):
+    cls = DETECTOR_CLASSES[name]
+    weights = config.DETECTORS[name]["weights"]
+    imgsz = cls.predict_kwargs["imgsz"]
+    names = YOLO(weights).names
+    print(f"📦 Exporting {name}: {os.path.basename(weights)} -> {fmt}{' INT8' if int8 else ''} @ {imgsz}")
+
+    with tempfile.TemporaryDirectory() as calib_dir:
+        frames = extract_frames(list_clips(clips), os.path.join(calib_dir, "images")) if clips else []
+        if int8 and not frames:
+            raise SystemExit("INT8 quantization needs --clips with recorded footage")
+
+        if fmt == "openvino":
+            exported = export_openvino(weights, imgsz, int8, calib_dir, names)
+        else:
+            exported = export_onnx(weights, imgsz, int8, frames)
+        print(f"✓ Wrote {exported}")
+
+        if frames:
+            report = compare(weights, exported, frames, cls.predict_kwargs)
+            report.update(detector=name, artifact=os.path.basename(exported), int8=int8)
+            backend = f"{fmt}{'-int8' if int8 else ''}"
+            report_path = f"{os.path.splitext(weights)[0]}.{backend}.json"
+            with open(report_path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"📊 recall {report['recall_vs_pt']:.1%}  precision {report['precision_vs_pt']:.1%}  "
+                  f"speedup x{report['speedup']}  -> {report_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export detector weights for CPU inference")
+    parser.add_argument("detector", choices=list(DETECTOR_CLASSES) + ["all"])
+    parser.add_argument("--format", choices=["onnx", "openvino"], default="openvino")
+    parser.add_argument("--int8", action="store_true", help="Post-training INT8 quantization")
+    parser.add_argument("--clips", help="Recorded clip or directory used for calibration and the accuracy report")
+    args = parser.parse_args()
+
+    names = list(DETECTOR_CLASSES) if args.detector == "all" else [args.detector]
+    for name in names:
+        clips = args.clips
+        if clips and args.detector == "all" and os.path.isdir(os.path.join(clips, name)):
+            clips = os.path.join(clips, name)  # clips/<detector>/ per model
+        export_detector(name, args.format, args.int8, clips)
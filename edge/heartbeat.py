@@ -0,0 +1,100 @@
+"""
+Per-bus heartbeat agent.
+
+One thread per bus reports every hosted detector in a single request to
+`/api/heartbeat` over a pooled keep-alive connection, instead of one
+connection per detector per interval. Send times are jittered so a fleet
+that booted together does not hit the server in lock-step. The
+`system_enabled` flags in the reply are shared with the detectors'
+adaptive rate.
+
+Servers without the bus endpoint (404) get the per-detector heartbeats
+instead, still over the same connection.
+"""
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import requests
+
+from edge import config
+
+
+class HeartbeatAgent:
+    def __init__(self, driver_id, detectors, url=config.HEARTBEAT_URL,
+                 interval=config.HEARTBEAT_INTERVAL, jitter=config.HEARTBEAT_JITTER):
+        self.driver_id = driver_id
+        self.detectors = detectors
+        self.url = url
+        self.interval = interval
+        self.jitter = jitter
+        self.session = requests.Session()
+        self.legacy = False  # Server has no bus endpoint
+        self.stopped = False
+
+    def health(self, det):
+        frame = getattr(det.camera, "latest_frame", None)  # Peek - latest() would mark the frame consumed
+        return {
+            "frame_id": det.frame_id,
+            "camera_age": round(time.time() - frame.timestamp, 2) if frame is not None else None,
+            "mode": det.rate.mode if det.rate is not None else "full",
+        }
+
+    def apply(self, det, enabled):
+        if enabled is not None and det.rate is not None:
+            det.rate.system_enabled = bool(enabled)
+
+    def beat(self):
+        """Send one heartbeat for the whole bus"""
+        if self.legacy:
+            return self.beat_each()
+        payload = {
+            "driver_id": self.driver_id,
+            "detectors": {det.name: self.health(det) for det in self.detectors},
+        }
+        response = self.session.post(self.url, json=payload, timeout=3)
+        if response.status_code == 404:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] ℹ️ No bus heartbeat endpoint - using per-detector heartbeats")
+            self.legacy = True
+            return self.beat_each()
+        if response.status_code != 200:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] ⚠️ Heartbeat failed: {response.status_code}")
+            return
+        enabled = response.json().get("system_enabled", {})
+        for det in self.detectors:
+            self.apply(det, enabled.get(det.name))
+
+    def beat_each(self):
+        for det in self.detectors:
+            response = self.session.post(f"{det.server_url}/heartbeat", json={"driver_id": det.driver_id}, timeout=3)
+            if response.status_code != 200:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] ⚠️ {det.name} heartbeat failed: {response.status_code}")
+                continue
+            self.apply(det, response.json().get("system_enabled"))
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def run(self):
+        time.sleep(random.uniform(0, self.interval))  # Spread buses that started together
+        while not self.stopped:
+            try:
+                self.beat()
+            except requests.exceptions.RequestException as e:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Heartbeat error: {str(e)[:50]}")
+            time.sleep(self.interval * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+def start(detectors):
+    """Start one heartbeat agent per bus (driver id) among `detectors`"""
+    by_bus = defaultdict(list)
+    for det in detectors:
+        by_bus[det.driver_id].append(det)
+    agents = [HeartbeatAgent(driver_id, dets) for driver_id, dets in by_bus.items()]
+    for agent in agents:
+        agent.start()
+    print(f"💓 Heartbeat started for {len(agents)} bus(es)")
+    return agents
@@ -0,0 +1,328 @@
+"""
+Fleet-scale load generator for the heartbeat and alert endpoints.
+
+Simulates a fleet of buses from one asyncio process. Every bus sends its
+heartbeat every HEARTBEAT_INTERVAL seconds (jittered like `edge.heartbeat`)
+and raises alert bursts - a child stepping onto the footboard, a head out of
+the window, a drowsy driver - as a Poisson process, each burst being a few
+alerts a second apart on one endpoint.
+
+The fleet ramps up in stages (`--start`, `--step`, `--max` buses, one stage
+every `--stage` seconds). Sends are open-loop: each request is scheduled on
+its own timer and timed from that moment, so a slow server shows up as
+latency instead of silently lowering the offered load. Per stage and
+endpoint the report lists requests/s, latency p50/p95/p99 and errors by
+kind; the first stage that breaks the SLO (`--slo-ms` p99, `--max-errors`
+error rate, or under 90% of the requests sent in the stage completed in it)
+is reported as the saturation point.
+
+Needs aiohttp, which the detectors themselves do not use:
+
+    pip install aiohttp
+
+Usage:
+    python -m edge.loadgen --driver-ids drivers.txt --start 100 --step 250 --max 5000 --stage 30
+    python -m edge.loadgen --driver-id <id1> --driver-id <id2> --max 2 --legacy-heartbeats -o load.json
+
+Every simulated bus reports as its own driver, so the fleet needs one
+distinct, already existing driver id per bus (`--driver-ids` reads them one
+per line) - heartbeats and alerts are stored against them, and buses sharing
+an id would merge on the server and understate the load.
+The server limits every client to 1000 requests per 15 minutes in
+development; start the local instance with RATE_LIMIT_DISABLED=1 for load
+runs, otherwise the report fills up with 429s.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+
+import aiohttp
+
+from edge import config
+
+# Alert bursts: (endpoint, weight, payloads) - payload fields as the detectors send them
+BURSTS = [
+    ("safety", 0.5, [
+        {"alert_type": "Warning", "status": "WARNING", "message": "WARNING: Person detected near footboard"},
+        {"alert_type": "Danger", "status": "CRITICAL", "message": "CRITICAL: Bus moving with footboard occupied!",
+         "sound": True},
+    ]),
+    ("window-safety", 0.3, [
+        {"alert_type": "hand_detected", "status": "WARNING", "severity": "WARNING",
+         "message": "Hand detected outside window!", "detection_class": "hand"},
+        {"alert_type": "head_detected", "status": "DANGER", "severity": "DANGER",
+         "message": "Head detected outside window!", "detection_class": "head"},
+    ]),
+    ("driver-monitor", 0.2, [
+        {"alert_type": "drowsy", "severity": "DANGER", "message": "Driver appears drowsy! Wake up immediately!",
+         "detection_class": "Drowsy/Eyes Closed", "sound": True},
+        {"alert_type": "phone_use", "severity": "DANGER", "message": "Phone usage detected! Put the phone down!",
+         "detection_class": "Phone Use", "sound": True},
+    ]),
+]
+DETECTOR_ENDPOINTS = {"footboard": "safety", "window": "window-safety", "driver": "driver-monitor"}
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class Stage:
+    """Latencies and outcomes of the requests completed during one ramp stage"""
+
+    def __init__(self, buses, nominal):
+        self.buses = buses
+        self.nominal = nominal  # Steady-state requests/s of this fleet size
+        self.sent = 0  # Requests whose send time fell in this stage
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    def record(self, endpoint, latency, error=None):
+        if error is None:
+            self.latencies[endpoint].append(latency)
+        else:
+            self.errors[endpoint][error] += 1
+
+    def summary(self):
+        endpoints = {}
+        total = failed = 0
+        worst_p99 = 0.0
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            latencies = self.latencies[endpoint]
+            errors = sum(self.errors[endpoint].values())
+            count = len(latencies) + errors
+            p99 = 1000 * percentile(latencies, 99)
+            worst_p99 = max(worst_p99, p99)
+            total += count
+            failed += errors
+            endpoints[endpoint] = {
+                "requests": count,
+                "rps": round(count / self.duration, 1) if self.duration else 0.0,
+                "p50_ms": round(1000 * percentile(latencies, 50), 1),
+                "p95_ms": round(1000 * percentile(latencies, 95), 1),
+                "p99_ms": round(p99, 1),
+                "max_ms": round(1000 * max(latencies), 1) if latencies else 0.0,
+                "error_rate": round(errors / count, 4) if count else 0.0,
+                "errors": dict(self.errors[endpoint]),
+            }
+        return {
+            "buses": self.buses,
+            "nominal_rps": round(self.nominal, 1),
+            "offered_rps": round(self.sent / self.duration, 1) if self.duration else 0.0,
+            "completed_rps": round(total / self.duration, 1) if self.duration else 0.0,
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "p99_ms": round(worst_p99, 1),
+            "endpoints": endpoints,
+        }
+
+
+class Fleet:
+    def __init__(self, server, driver_ids, interval=config.HEARTBEAT_INTERVAL, jitter=config.HEARTBEAT_JITTER,
+                 bursts_per_hour=6.0, legacy=False, timeout=10.0):
+        self.server = server.rstrip("/")
+        self.interval = interval
+        self.jitter = jitter
+        self.burst_rate = bursts_per_hour / 3600  # Bursts per bus per second
+        self.legacy = legacy  # Per-detector heartbeats instead of one per bus
+        self.driver_ids = driver_ids  # One existing driver per bus
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+        self.stage = None
+        self.buses = []
+        self.pending = set()
+
+    # --- REQUESTS ---
+    async def send(self, endpoint, path, payload, due):
+        """POST at `due` (loop time) and record the latency measured from then"""
+        delay = due - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        scheduled = time.perf_counter() + min(delay, 0)  # A late start counts towards the latency
+        self.stage.sent += 1
+        error = None
+        try:
+            async with self.session.post(f"{self.server}{path}", json=payload) as response:
+                await response.read()
+                if response.status >= 400:
+                    error = f"http_{response.status}"
+        except asyncio.TimeoutError:
+            error = "timeout"
+        except aiohttp.ClientError as e:
+            error = type(e).__name__
+        # Counted in the stage it completes in, so requests stuck past a stage boundary are not lost
+        self.stage.record(endpoint, time.perf_counter() - scheduled, error)
+
+    def schedule(self, endpoint, path, payload, due):
+        task = asyncio.create_task(self.send(endpoint, path, payload, due))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    # --- SIMULATED BUSES ---
+    def heartbeat(self, driver_id, due):
+        if self.legacy:
+            for endpoint in DETECTOR_ENDPOINTS.values():
+                self.schedule(f"{endpoint}/heartbeat", f"/api/{endpoint}/heartbeat", {"driver_id": driver_id}, due)
+            return
+        payload = {
+            "driver_id": driver_id,
+            "detectors": {
+                name: {"frame_id": random.randint(1, 10 ** 6), "camera_age": round(random.uniform(0, 0.2), 2),
+                       "mode": "full"}
+                for name in DETECTOR_ENDPOINTS
+            },
+        }
+        self.schedule("heartbeat", "/api/heartbeat", payload, due)
+
+    def burst(self, driver_id, due):
+        endpoint, _, alerts = random.choices(BURSTS, weights=[b[1] for b in BURSTS])[0]
+        for i in range(random.randint(1, 4)):  # Repeats while the condition lasts
+            template = random.choice(alerts)
+            payload = {"driver_id": driver_id, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "confidence": round(random.uniform(0.5, 0.99), 3), **template}
+            if endpoint == "safety":
+                payload["speed"] = round(random.uniform(0, 40), 1)
+            self.schedule(f"{endpoint}/alerts", f"/api/{endpoint}/alerts", payload, due + i * random.uniform(0.5, 2))
+
+    async def bus(self, driver_id):
+        loop = asyncio.get_running_loop()
+        next_beat = loop.time() + random.uniform(0, self.interval)  # Buses come online spread out
+        next_burst = loop.time() + random.expovariate(self.burst_rate) if self.burst_rate else float("inf")
+        while True:
+            due = min(next_beat, next_burst)
+            await asyncio.sleep(max(0.0, due - loop.time() - 0.05))  # Wake just ahead, send() waits the rest
+            if next_beat <= next_burst:
+                self.heartbeat(driver_id, next_beat)
+                next_beat += self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            else:
+                self.burst(driver_id, next_burst)
+                next_burst += random.expovariate(self.burst_rate)
+
+    def add_buses(self, count):
+        for _ in range(count):
+            index = len(self.buses)
+            driver_id = self.driver_ids[index]
+            self.buses.append(asyncio.create_task(self.bus(driver_id)))
+
+    def offered_rps(self, buses):
+        heartbeats = buses * (len(DETECTOR_ENDPOINTS) if self.legacy else 1) / self.interval
+        return heartbeats + buses * self.burst_rate * 2.5  # 2.5 alerts per burst on average
+
+    # --- RAMP ---
+    async def ramp(self, start, step, maximum, stage_seconds, slo_ms, max_errors, connections, full=False):
+        if maximum > len(self.driver_ids):
+            raise ValueError(f"{maximum} buses need {maximum} distinct driver ids, got {len(self.driver_ids)}")
+        connector = aiohttp.TCPConnector(limit=connections, keepalive_timeout=30)
+        stages = []
+        saturation = None
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as self.session:
+            target = start
+            while target <= maximum:
+                self.add_buses(target - len(self.buses))
+                self.stage = Stage(target, self.offered_rps(target))
+                await asyncio.sleep(stage_seconds)
+                self.stage.duration = time.perf_counter() - self.stage.started
+                summary = self.stage.summary()
+                stages.append(summary)
+                print_stage(summary)
+
+                reasons = []
+                if summary["p99_ms"] > slo_ms:
+                    reasons.append(f"p99 {summary['p99_ms']:.0f} ms > {slo_ms:.0f} ms")
+                if summary["error_rate"] > max_errors:
+                    reasons.append(f"errors {summary['error_rate']:.1%}")
+                if summary["completed_rps"] < 0.9 * summary["offered_rps"]:
+                    reasons.append(f"completed {summary['completed_rps']} of {summary['offered_rps']} req/s")
+                if reasons and saturation is None:
+                    saturation = {"buses": target, "offered_rps": summary["offered_rps"],
+                                  "completed_rps": summary["completed_rps"], "reasons": reasons}
+                    print(f"🔥 Saturated at {target} buses: {', '.join(reasons)}", file=sys.stderr)
+                    if not full:
+                        break
+                target += step
+
+            for task in self.buses:
+                task.cancel()
+            await asyncio.gather(*self.buses, return_exceptions=True)
+            for task in list(self.pending):
+                task.cancel()
+            await asyncio.gather(*self.pending, return_exceptions=True)
+        return {
+            "server": self.server,
+            "heartbeat": "per-detector" if self.legacy else "per-bus",
+            "interval": self.interval,
+            "bursts_per_hour": round(self.burst_rate * 3600, 2),
+            "slo": {"p99_ms": slo_ms, "error_rate": max_errors},
+            "stages": stages,
+            "saturation": saturation,
+        }
+
+
+def print_stage(summary):
+    print(f"🚌 {summary['buses']:>6} buses  offered {summary['offered_rps']:>8.1f} req/s  "
+          f"completed {summary['completed_rps']:>8.1f} req/s  errors {summary['error_rate']:.2%}",
+          file=sys.stderr)
+    for endpoint, stats in summary["endpoints"].items():
+        errors = ", ".join(f"{kind} {n}" for kind, n in stats["errors"].items())
+        print(f"     {endpoint:<24} {stats['rps']:>8.1f} req/s  p50 {stats['p50_ms']:>7.1f}  "
+              f"p95 {stats['p95_ms']:>7.1f}  p99 {stats['p99_ms']:>7.1f} ms"
+              + (f"  [{errors}]" if errors else ""), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fleet load generator for the heartbeat and alert endpoints")
+    parser.add_argument("--server", default=config.SERVER_BASE, help="Server base URL")
+    parser.add_argument("--start", type=int, default=100, help="Buses in the first stage")
+    parser.add_argument("--step", type=int, default=250, help="Buses added per stage")
+    parser.add_argument("--max", type=int, default=5000, help="Largest fleet")
+    parser.add_argument("--stage", type=float, default=30, help="Seconds per stage")
+    parser.add_argument("--bursts", type=float, default=6.0, help="Alert bursts per bus per hour")
+    parser.add_argument("--legacy-heartbeats", action="store_true",
+                        help="One heartbeat per detector instead of one per bus")
+    parser.add_argument("--driver-id", action="append", dest="driver_ids", default=[],
+                        help="Existing driver id for one bus (repeat, one per bus)")
+    parser.add_argument("--driver-ids", dest="driver_file", help="File with one existing driver id per line")
+    parser.add_argument("--connections", type=int, default=1000, help="Client connection pool size")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--slo-ms", type=float, default=500, help="p99 latency that counts as saturated")
+    parser.add_argument("--max-errors", type=float, default=0.01, help="Error rate that counts as saturated")
+    parser.add_argument("--full", action="store_true", help="Keep ramping past the saturation point")
+    parser.add_argument("-o", "--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    driver_ids = list(args.driver_ids)
+    if args.driver_file:
+        with open(args.driver_file) as f:
+            driver_ids += [line.strip() for line in f if line.strip()]
+    driver_ids = list(dict.fromkeys(driver_ids))  # Distinct, in order
+    if len(driver_ids) < args.max:
+        parser.error(f"--max {args.max} needs {args.max} distinct driver ids (--driver-id / --driver-ids), "
+                     f"got {len(driver_ids)}")
+
+    fleet = Fleet(args.server, driver_ids, bursts_per_hour=args.bursts, legacy=args.legacy_heartbeats,
+                  timeout=args.timeout)
+    try:
+        report = asyncio.run(fleet.ramp(args.start, args.step, args.max, args.stage, args.slo_ms,
+                                        args.max_errors, args.connections, args.full))
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+    if not report["stages"]:
+        print(f"⚠️ No stage ran (--start {args.start} > --max {args.max})", file=sys.stderr)
+    elif report["saturation"] is None:
+        print(f"✓ No saturation up to {report['stages'][-1]['buses']} buses", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
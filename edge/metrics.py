@@ -0,0 +1,228 @@
+"""
+Hot-path instrumentation - per-stage latency, frame and drop counters,
+alert queue depth.
+
+Enabled by METRICS_PORT (Prometheus text at http://<METRICS_HOST>:<port>/metrics,
+localhost unless METRICS_HOST says otherwise)
+and/or METRICS_FILE (a JSON snapshot appended every METRICS_INTERVAL
+seconds, rotated at 10 MB). When both are off the engine uses NULL_CLOCK
+and nothing is measured.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from edge import camera, config
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+MAX_FILE_BYTES = 10 * 1024 * 1024
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+
+class StageClock:
+    """Times consecutive stages of one frame: each lap() closes the previous stage"""
+
+    __slots__ = ("stages", "last")
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = Histogram()
+        hist.observe(now - self.last)
+        self.last = now
+
+
+class NullClock:
+    __slots__ = ()
+
+    def lap(self, stage):
+        pass
+
+
+NULL_CLOCK = NullClock()
+
+
+class Metrics:
+    def __init__(self, detectors):
+        self.detectors = detectors
+        self.stages = {det.name: {} for det in detectors}
+        self.frames = {det.name: 0 for det in detectors}
+        self.started = time.time()
+
+    def clock(self, name):
+        """Start timing one frame for detector `name`"""
+        self.frames[name] += 1
+        return StageClock(self.stages[name])
+
+    # --- COLLECTION ---
+    def snapshot(self):
+        from edge.dispatch import peek_dispatcher
+        dispatcher = peek_dispatcher()  # A scrape must not start a dispatcher (and its spool) itself
+
+        detectors = {}
+        for det in self.detectors:
+            gate = det.motion_gate
+            detectors[det.name] = {
+                "frames": self.frames[det.name],
+                "skipped": gate.skipped if gate is not None else 0,
+                "cascade": det.cascade.stats() if det.cascade is not None else None,
+                "stages": {
+                    stage: {"count": h.count, "sum": round(h.total, 6), "max": round(h.max, 6),
+                            "avg_ms": round(1000 * h.total / h.count, 3) if h.count else 0.0}
+                    for stage, h in self.stages[det.name].items()
+                },
+            }
+        cameras = {
+            url: {"decoded": cam.decoded, "dropped": cam.dropped,
+                  "decode_avg_ms": round(1000 * cam.decode_time / cam.decoded, 3) if cam.decoded else 0.0}
+            for url, cam in list(camera._cameras.items())
+        }
+        return {
+            "ts": time.time(),
+            "uptime": round(time.time() - self.started, 1),
+            "detectors": detectors,
+            "cameras": cameras,
+            "alerts": {
+                "queue_depth": getattr(dispatcher, "depth", 0),
+                "spool_backlog": getattr(dispatcher, "backlog", 0),
+                "sent": getattr(dispatcher, "sent", 0),
+                "batches": getattr(dispatcher, "batches", 0),
+                "dropped": getattr(dispatcher, "dropped", 0),
+                "dead_lettered": getattr(dispatcher, "dead_lettered", 0),
+                "posts": getattr(dispatcher, "posts", 0),
+                "post_seconds": round(getattr(dispatcher, "post_time", 0.0), 6),
+                "post_avg_ms": round(1000 * dispatcher.post_time / dispatcher.posts, 3)
+                if getattr(dispatcher, "posts", 0) else 0.0,
+            },
+        }
+
+    def prometheus(self):
+        """Render all metrics in Prometheus text exposition format"""
+        snap = self.snapshot()
+        lines = [
+            "# TYPE edge_stage_seconds histogram",
+        ]
+        for name in self.stages:
+            for stage, h in self.stages[name].items():
+                labels = f'detector="{name}",stage="{stage}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h.counts):
+                    cumulative += count
+                    lines.append(f'edge_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'edge_stage_seconds_bucket{{{labels},le="+Inf"}} {h.count}')
+                lines.append(f"edge_stage_seconds_sum{{{labels}}} {h.total:.6f}")
+                lines.append(f"edge_stage_seconds_count{{{labels}}} {h.count}")
+
+        lines.append("# TYPE edge_frames_total counter")
+        lines.append("# TYPE edge_frames_skipped_total counter")
+        for name, det in snap["detectors"].items():
+            lines.append(f'edge_frames_total{{detector="{name}"}} {det["frames"]}')
+            lines.append(f'edge_frames_skipped_total{{detector="{name}"}} {det["skipped"]}')
+
+        lines.append("# TYPE edge_cascade_frames_total counter")
+        lines.append("# TYPE edge_cascade_hit_rate gauge")
+        lines.append("# TYPE edge_cascade_miss_rate gauge")
+        for name, det in snap["detectors"].items():
+            gate = det["cascade"]
+            if gate is None:
+                continue
+            for outcome in ("escalated", "rejected", "audited"):
+                lines.append(f'edge_cascade_frames_total{{detector="{name}",outcome="{outcome}"}} {gate[outcome]}')
+            lines.append(f'edge_cascade_hit_rate{{detector="{name}"}} {gate["hit_rate"]}')
+            lines.append(f'edge_cascade_miss_rate{{detector="{name}"}} {gate["miss_rate"]}')
+
+        lines.append("# TYPE edge_camera_frames_total counter")
+        lines.append("# TYPE edge_camera_dropped_total counter")
+        for url, cam in snap["cameras"].items():
+            lines.append(f'edge_camera_frames_total{{camera="{url}"}} {cam["decoded"]}')
+            lines.append(f'edge_camera_dropped_total{{camera="{url}"}} {cam["dropped"]}')
+
+        alerts = snap["alerts"]
+        lines += [
+            "# TYPE edge_alert_queue_depth gauge",
+            f"edge_alert_queue_depth {alerts['queue_depth']}",
+            "# TYPE edge_alert_spool_backlog gauge",
+            f"edge_alert_spool_backlog {alerts['spool_backlog']}",
+            "# TYPE edge_alerts_sent_total counter",
+            f"edge_alerts_sent_total {alerts['sent']}",
+            "# TYPE edge_alerts_dropped_total counter",
+            f"edge_alerts_dropped_total {alerts['dropped']}",
+            "# TYPE edge_alerts_dead_lettered_total counter",
+            f"edge_alerts_dead_lettered_total {alerts['dead_lettered']}",
+            "# TYPE edge_alert_post_seconds summary",
+            f"edge_alert_post_seconds_sum {alerts['post_seconds']:.6f}",
+            f"edge_alert_post_seconds_count {alerts['posts']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    # --- EXPOSITION ---
+    def serve(self, port, host=config.METRICS_HOST):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/metrics":
+                    body = metrics.prometheus().encode()
+                    content_type = "text/plain; version=0.0.4"
+                else:
+                    body = json.dumps(metrics.snapshot()).encode()
+                    content_type = "application/json"
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        print(f"📈 Metrics on http://{host}:{port}/metrics")
+
+    def write_file(self, path, interval):
+        """Append a JSON snapshot every `interval` seconds, rotating at 10 MB"""
+        while True:
+            time.sleep(interval)
+            if os.path.exists(path) and os.path.getsize(path) > MAX_FILE_BYTES:
+                os.replace(path, path + ".1")
+            with open(path, "a") as f:
+                f.write(json.dumps(self.snapshot()) + "\n")
+
+
+def start(detectors, port=config.METRICS_PORT, path=config.METRICS_FILE, interval=config.METRICS_INTERVAL,
+          host=config.METRICS_HOST):
+    """Create and expose metrics; returns None when instrumentation is off"""
+    if not port and not path:
+        return None
+    metrics = Metrics(detectors)
+    if port:
+        metrics.serve(port, host)
+    if path:
+        threading.Thread(target=metrics.write_file, args=(path, interval), daemon=True).start()
+    return metrics
@@ -0,0 +1,86 @@
+"""
+Motion gate - skip YOLO when the monitored scene hasn't changed.
+
+Frames are shrunk to a tiny grayscale thumbnail and compared against the
+thumbnail of the last frame that was actually inferred. Slow drift therefore
+still accumulates into a refresh, and a forced refresh interval guarantees
+the detector never goes blind on a static scene.
+
+Detectors with an ROI only watch their ROI: each ROI window gets its own
+thumbnail, pixels outside the polygons are masked out of the comparison, and
+movement in any one window is enough to trigger an inference.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from edge import config
+
+THUMB_SIZE = (64, 48)
+PIXEL_DELTA = 18  # Grayscale change that counts as "moved"
+
+
+def regions(roi, frame_size=config.FRAME_SIZE):
+    """(window, thumbnail size, ROI mask or None) for every area the gate compares"""
+    width, height = frame_size
+    if roi is None:
+        return [((0, 0, width, height), THUMB_SIZE, None)]
+    # Same pixel density as the full-frame thumbnail
+    sx, sy = THUMB_SIZE[0] / width, THUMB_SIZE[1] / height
+    areas = []
+    for (x0, y0, x1, y1), outside in zip(roi.windows, roi.blank):
+        size = (max(round((x1 - x0) * sx), 8), max(round((y1 - y0) * sy), 8))
+        mask = None
+        if outside is not None:
+            mask = cv2.resize((~outside).astype(np.uint8), size, interpolation=cv2.INTER_NEAREST)
+        areas.append(((x0, y0, x1, y1), size, mask))
+    return areas
+
+
+class MotionGate:
+    def __init__(self, threshold=config.MOTION_THRESHOLD, refresh=config.MOTION_REFRESH, roi=None):
+        self.threshold = threshold  # Fraction of changed thumbnail pixels
+        self.refresh = refresh      # Seconds between forced inferences
+        self.regions = regions(roi)
+        self.reference = None
+        self.last_infer_time = 0.0
+        self.total = 0
+        self.skipped = 0
+
+    def thumbnails(self, frame):
+        thumbs = []
+        for (x0, y0, x1, y1), size, _ in self.regions:
+            small = cv2.resize(frame[y0:y1, x0:x1], size, interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            thumbs.append(cv2.GaussianBlur(gray, (5, 5), 0))
+        return thumbs
+
+    def moved(self, thumb, reference, mask):
+        """True if enough of one region's (unmasked) pixels changed"""
+        moved = cv2.threshold(cv2.absdiff(thumb, reference), PIXEL_DELTA, 255, cv2.THRESH_BINARY)[1]
+        if mask is None:
+            return cv2.countNonZero(moved) > self.threshold * thumb.size
+        return cv2.countNonZero(moved * mask) > self.threshold * max(cv2.countNonZero(mask), 1)
+
+    def check(self, frame, now=None):
+        """Return True if `frame` needs a fresh inference"""
+        self.total += 1
+        now = time.time() if now is None else now
+        thumbs = self.thumbnails(frame)
+
+        changed = True
+        if self.reference is not None and now - self.last_infer_time < self.refresh:
+            changed = any(self.moved(thumb, reference, mask)
+                          for thumb, reference, (_, _, mask) in zip(thumbs, self.reference, self.regions))
+
+        if changed:
+            self.reference = thumbs
+            self.last_infer_time = now
+        else:
+            self.skipped += 1
+        return changed
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.total if self.total else 0.0
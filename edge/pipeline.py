@@ -0,0 +1,261 @@
+"""
+Multi-process pipeline mode.
+
+Each camera is decoded (and resized to FRAME_SIZE) in its own process and
+handed to the inference process through a `multiprocessing.shared_memory`
+ring of fixed-size frame slots - frames are written straight into shared
+memory and read as numpy views, never pickled. Decode and inference no
+longer share one GIL, and each process gets its own slice of the cores
+(OpenCV single-threaded in decoders, torch threads in the inference
+process).
+
+Backpressure is explicit: when every slot holds a frame inference has not
+taken yet, the decoder either overwrites the oldest one (`drop_oldest`,
+live cameras - latency stays bounded at SLOTS frames) or waits for a slot
+to free up (`block`, nothing is lost). Drops are counted and show up as
+camera drops in the metrics.
+
+Usage:
+    python -m edge.pipeline                          # all three detectors
+    python -m edge.pipeline footboard --slots 3 --policy block
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from edge import camera, config
+from edge.camera import Frame
+
+# Counter slots in the ring header
+WRITTEN, DROPPED, READ_ID, DECODE_US, STOPPED = range(5)
+COUNTERS = 5
+
+
+class FrameRing:
+    """Frame slots plus their bookkeeping in one shared memory block"""
+
+    def __init__(self, slots=config.PIPELINE_SLOTS, size=config.FRAME_SIZE, name=None):
+        if slots < 2:
+            raise ValueError("A frame ring needs at least 2 slots")
+        width, height = size
+        self.slots = slots
+        self.shape = (height, width, 3)
+        header = 8 * (COUNTERS + 3 * slots)
+        create = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=create,
+                                              size=header + slots * height * width * 3)
+
+        buf = self.shm.buf
+        self.counters = np.ndarray(COUNTERS, np.int64, buf, 0)
+        self.ids = np.ndarray(slots, np.int64, buf, 8 * COUNTERS)  # Frame id per slot, 0 = empty/being written
+        self.busy = np.ndarray(slots, np.int64, buf, 8 * (COUNTERS + slots))  # Readers holding the slot
+        self.stamps = np.ndarray(slots, np.float64, buf, 8 * (COUNTERS + 2 * slots))
+        self.images = np.ndarray((slots,) + self.shape, np.uint8, buf, header)
+        if create:
+            self.counters[:] = 0
+            self.ids[:] = 0
+            self.busy[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def claim(self, cond, policy):
+        """Pick the slot to write next (caller holds `cond`); None once stopped"""
+        while not self.counters[STOPPED]:
+            free = np.flatnonzero(self.busy == 0)
+            slot = int(free[self.ids[free].argmin()])  # Empty or oldest frame
+            if self.ids[slot] <= self.counters[READ_ID]:
+                break
+            if policy == "drop_oldest":
+                self.counters[DROPPED] += 1
+                break
+            cond.wait(0.1)  # block: wait for inference to take a frame
+        else:
+            return None
+        self.ids[slot] = 0
+        return slot
+
+    def close(self):
+        del self.counters, self.ids, self.busy, self.stamps, self.images
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A frame view is still referenced - freed with the process
+
+
+def decode_worker(url, name, slots, cond, policy):
+    """Decoder process: camera -> resized frames in the shared ring"""
+    cv2.setNumThreads(1)
+    ring = FrameRing(slots, name=name)
+    source = camera.open_camera(url)
+    width, height = config.FRAME_SIZE
+    last_id = frame_id = 0
+    while not ring.counters[STOPPED]:
+        frame = source.wait_for_next(last_id, timeout=0.5)
+        if frame is None:
+            continue
+        last_id = frame.id
+        frame = source.decode(frame)
+        if frame is None:
+            continue  # Corrupt JPEG
+        start = time.perf_counter()
+        with cond:
+            slot = ring.claim(cond, policy)
+        if slot is None:
+            break
+        image = frame.image
+        if image.shape[:2] == (height, width):
+            np.copyto(ring.images[slot], image)
+        else:
+            cv2.resize(image, (width, height), dst=ring.images[slot])
+        with cond:
+            frame_id += 1
+            ring.ids[slot] = frame_id
+            ring.stamps[slot] = frame.timestamp
+            ring.counters[WRITTEN] += 1
+            ring.counters[DECODE_US] += int(1e6 * (time.perf_counter() - start))
+            cond.notify_all()
+    camera.release_all()
+    ring.close()
+
+
+class SharedCamera:
+    """
+    Inference-side view of a FrameRing with the FastCamera interface.
+    Frames are handed out oldest first; a returned frame's slot stays
+    reserved until the next call, so its image is never overwritten while
+    a detector works on it.
+    """
+
+    def __init__(self, url, ring, cond, process):
+        self.url = url
+        self.ring = ring
+        self.cond = cond
+        self.process = process
+        self.held = None
+        self.fresh = False
+
+    # Counters for edge.metrics
+    @property
+    def decoded(self):
+        return int(self.ring.counters[WRITTEN])
+
+    @property
+    def dropped(self):
+        return int(self.ring.counters[DROPPED])
+
+    @property
+    def decode_time(self):
+        return self.ring.counters[DECODE_US] / 1e6
+
+    @property
+    def latest_frame(self):
+        """Newest frame's id and timestamp (no image) - a lock-free peek"""
+        slot = int(self.ring.ids.argmax())
+        if not self.ring.ids[slot]:
+            return None
+        return Frame(int(self.ring.ids[slot]), float(self.ring.stamps[slot]), None)
+
+    def take(self, slot):
+        """Reserve `slot` for the caller (caller holds `cond`)"""
+        ring = self.ring
+        if self.held is not None:
+            ring.busy[self.held] -= 1
+        ring.busy[slot] += 1
+        self.held = slot
+        frame_id = int(ring.ids[slot])
+        ring.counters[READ_ID] = max(ring.counters[READ_ID], frame_id)
+        self.cond.notify_all()  # A blocked decoder may have room now
+        return Frame(frame_id, float(ring.stamps[slot]), ring.images[slot])
+
+    def wait_for_next(self, after_id=0, timeout=None):
+        ring = self.ring
+        with self.cond:
+            ready = self.cond.wait_for(lambda: ring.counters[STOPPED] or (ring.ids > after_id).any(), timeout)
+            if not ready or ring.counters[STOPPED]:
+                return None
+            newer = np.flatnonzero(ring.ids > after_id)
+            return self.take(int(newer[ring.ids[newer].argmin()]))
+
+    def latest(self):
+        with self.cond:
+            if not self.ring.ids.any():
+                return None
+            return self.take(int(self.ring.ids.argmax()))
+
+    def decode(self, frame):
+        """Frames arrive decoded and resized from the decoder process"""
+        return frame
+
+    def get_frame(self):
+        frame = self.latest()
+        return frame.image if frame is not None else None
+
+    def release(self):
+        print(f"📊 {self.url}: {self.decoded} frames decoded, {self.dropped} dropped")
+        with self.cond:
+            self.ring.counters[STOPPED] = 1
+            self.cond.notify_all()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.held = None
+        self.ring.close()
+        self.ring.shm.unlink()
+
+
+def start_decoders(urls, slots=config.PIPELINE_SLOTS, policy=config.PIPELINE_POLICY):
+    """Start one decoder process per camera and register its shared ring with edge.camera"""
+    ctx = multiprocessing.get_context("spawn")
+    for url in urls:
+        ring = FrameRing(slots)
+        cond = ctx.Condition()
+        process = ctx.Process(target=decode_worker, args=(url, ring.name, slots, cond, policy), daemon=True)
+        process.start()
+        camera.attach_camera(url, SharedCamera(url, ring, cond, process))
+        print(f"🧵 Decoder process {process.pid}: {url} ({slots} slots, {policy})")
+
+
+def run(names, slots=config.PIPELINE_SLOTS, policy=config.PIPELINE_POLICY,
+        headless=config.HEADLESS, preview_port=config.PREVIEW_PORT):
+    import torch
+    from edge.dispatch import stop_dispatcher
+    from edge.engine import Engine, build_detectors, exit_on_sigterm
+
+    exit_on_sigterm()
+    detectors = build_detectors(names)
+    urls = sorted({det.video_url for det in detectors})
+    start_decoders(urls, slots, policy)
+    # Decoders take one core each, inference gets the rest
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) - len(urls)))
+
+    engine = Engine(detectors, headless=headless, preview_port=preview_port)
+    try:
+        engine.start()
+        print("System Ready! Press Ctrl+C to quit." if engine.headless else "System Ready! Press 'Q' to quit.")
+        print("-" * 60)
+        engine.run()  # Stops the decoders as it closes the cameras
+    finally:
+        stop_dispatcher()
+    print("\nSystem Stopped.")
+
+
+if __name__ == "__main__":
+    from edge.engine import DETECTOR_NAMES
+
+    parser = argparse.ArgumentParser(description="Multi-process decode/inference pipeline")
+    parser.add_argument("detectors", nargs="*", default=list(DETECTOR_NAMES), choices=DETECTOR_NAMES)
+    parser.add_argument("--slots", type=int, default=config.PIPELINE_SLOTS, help="Frames buffered per camera")
+    parser.add_argument("--policy", choices=("drop_oldest", "block"), default=config.PIPELINE_POLICY,
+                        help="What a decoder does when inference falls behind")
+    parser.add_argument("--headless", action="store_true", help="No annotation or display windows")
+    parser.add_argument("--preview-port", type=int, default=config.PREVIEW_PORT,
+                        help="Serve an MJPEG preview on this port (0 = off)")
+    args = parser.parse_args()
+    run(args.detectors, args.slots, args.policy, args.headless or config.HEADLESS, args.preview_port)
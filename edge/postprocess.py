@@ -0,0 +1,72 @@
+"""
+Vectorized detection post-processing.
+
+Each YOLO result is pulled off the device once as an (N, 6) array and reduced
+with whole-array operations. Per-class confidence thresholds and the
+class -> alert mapping are compiled into index arrays when a model is bound,
+so the alert logic never touches `result.boxes` or `model.names` per box.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Detections(NamedTuple):
+    """Compact per-frame result handed to the alert logic"""
+    cls: np.ndarray    # (N,) int class ids, after per-class thresholds
+    conf: np.ndarray   # (N,) float confidences
+    xyxy: np.ndarray   # (N, 4) float boxes in frame pixels
+    best: np.ndarray   # (num_classes,) max confidence per class, 0 where absent
+    ids: np.ndarray = None  # (N,) track ids when produced by edge.tracking
+
+    def __len__(self):
+        return len(self.cls)
+
+    def top(self):
+        """(class_id, confidence) of the most confident box, or (None, 0.0)"""
+        if not len(self.conf):
+            return None, 0.0
+        i = int(self.conf.argmax())
+        return int(self.cls[i]), float(self.conf[i])
+
+
+def compile_thresholds(names, default, overrides=None):
+    """Per-class confidence threshold array indexed by class id"""
+    thresholds = np.full(len(names), default, dtype=np.float32)
+    for class_id, label in names.items():
+        if overrides and label in overrides:
+            thresholds[class_id] = overrides[label]
+    return thresholds
+
+
+def compile_lookup(names, fn, dtype=np.int16):
+    """Array mapping class id -> fn(label), e.g. an alert code"""
+    return np.array([fn(names[i]) for i in range(len(names))], dtype=dtype)
+
+
+def empty(num_classes):
+    return Detections(
+        np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32),
+        np.zeros((0, 4), dtype=np.float32), np.zeros(num_classes, dtype=np.float32)
+    )
+
+
+def from_arrays(cls, conf, xyxy, thresholds):
+    """Apply per-class thresholds to raw arrays and build Detections"""
+    num_classes = len(thresholds)
+    if not len(cls):
+        return empty(num_classes)
+    keep = conf >= thresholds[cls]
+    cls, conf, xyxy = cls[keep], conf[keep], xyxy[keep]
+    best = np.zeros(num_classes, dtype=np.float32)
+    np.maximum.at(best, cls, conf)
+    return Detections(cls, conf, xyxy, best)
+
+
+def summarize(result, thresholds):
+    """Reduce one ultralytics result to Detections"""
+    data = result.boxes.data
+    if not len(data):
+        return empty(len(thresholds))
+    data = data.cpu().numpy()  # One device->host copy per frame
+    return from_arrays(data[:, 5].astype(np.int64), data[:, 4], data[:, :4], thresholds)
@@ -0,0 +1,107 @@
+"""
+Opt-in MJPEG preview stream for headless edge units.
+
+Open http://<PREVIEW_HOST>:<PREVIEW_PORT>/<detector> in a browser. The
+stream has no authentication, so it listens on localhost unless PREVIEW_HOST
+says otherwise (reach it through an SSH tunnel). Frames are only
+annotated while a client is connected, at most PREVIEW_FPS per detector, and
+JPEG encoding happens on the client's thread - not in the frame loop.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from edge import config
+
+BOUNDARY = "frame"
+KEEPALIVE = 5.0  # Seconds without a frame before a keep-alive write probes the client
+
+
+class PreviewServer:
+    def __init__(self, port=config.PREVIEW_PORT, fps=config.PREVIEW_FPS, quality=70, host=config.PREVIEW_HOST,
+                 names=()):
+        self.port = port
+        self.interval = 1.0 / fps
+        self.quality = quality
+        self.clients = {}
+        self.frames = {name: None for name in names}  # Only these detectors can be streamed
+        self.last_publish = {}
+        self.cond = threading.Condition()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                name = self.path.strip("/")
+                if not name:
+                    links = "".join(f'<li><a href="/{n}">{n}</a></li>' for n in sorted(server.frames))
+                    body = f"<h3>Sisuraksha preview</h3><ul>{links}</ul>".encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if name not in server.frames:
+                    self.send_error(404, "No such detector")
+                    return
+                server.stream(name, self)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"📺 Preview stream on http://{host}:{port}/")
+
+    def wants(self, name):
+        """True if a client is watching `name` and the preview FPS cap allows a frame"""
+        if not self.clients.get(name):
+            return False
+        return time.time() - self.last_publish.get(name, 0.0) >= self.interval
+
+    def publish(self, name, frame):
+        with self.cond:
+            self.frames[name] = frame
+            self.last_publish[name] = time.time()
+            self.cond.notify_all()
+
+    def stream(self, name, handler):
+        handler.send_response(200)
+        handler.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+
+        with self.cond:
+            self.clients[name] = self.clients.get(name, 0) + 1
+        try:
+            last = None
+            while True:
+                with self.cond:
+                    self.cond.wait_for(lambda: self.frames.get(name) is not last, timeout=KEEPALIVE)
+                    frame = self.frames.get(name)
+                if frame is None or frame is last:
+                    # Nothing new - a write to a closed socket raises, so a gone client is noticed
+                    handler.wfile.write(b"\r\n")
+                    handler.wfile.flush()
+                    continue
+                last = frame
+                ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if not ok:
+                    continue
+                handler.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                )
+                handler.wfile.write(jpeg.tobytes())
+                handler.wfile.write(b"\r\n")
+        except OSError:
+            pass  # Client went away
+        finally:
+            with self.cond:
+                self.clients[name] -= 1
+
+    def close(self):
+        self.httpd.shutdown()
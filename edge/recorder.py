@@ -0,0 +1,153 @@
+"""
+Pre-alert evidence clips.
+
+Each detector keeps the last RECORD_PRE_ROLL seconds of its camera as JPEG
+bytes in a ring bounded by both age and RECORD_MAX_MB, sampled at most
+RECORD_FPS - so memory use is fixed regardless of stream resolution or
+alert rate. When a CRITICAL/DANGER alert fires, the pre-roll plus
+RECORD_POST_ROLL seconds after it are written to
+
+    .clips/<detector>/<YYYYmmdd-HHMMSS>_<alert_type>.mjpeg   (or .mp4)
+
+Repeats of the same alert extend its clip, up to RECORD_MAX_CLIP seconds
+including the pre-roll; an alert that keeps firing past that is split into
+consecutive clips, so an open clip never holds more than RECORD_MAX_CLIP *
+RECORD_FPS frames.
+
+The frame loop only hands over a reference to the frame; JPEG encoding and
+file writing run on the recorder's own thread. `.mjpeg` files are the
+stored JPEGs back to back (plays in VLC/ffplay, no re-encode); `.mp4`
+decodes and re-encodes them with OpenCV.
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from edge import config
+
+
+class ClipRecorder:
+    def __init__(self, name, pre_roll=config.RECORD_PRE_ROLL, post_roll=config.RECORD_POST_ROLL,
+                 fps=config.RECORD_FPS, max_mb=config.RECORD_MAX_MB, quality=config.RECORD_QUALITY,
+                 directory=config.RECORD_DIR, fmt=config.RECORD_FORMAT, max_clip=config.RECORD_MAX_CLIP):
+        self.name = name
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.max_clip = max_clip
+        self.interval = 1.0 / fps
+        self.fps = fps
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.quality = quality
+        self.directory = os.path.join(directory, name)
+        self.format = fmt
+        self.ring = deque()  # (timestamp, jpeg bytes), oldest first
+        self.ring_bytes = 0
+        self.pending = None  # Newest (timestamp, frame) not yet encoded
+        self.last_add = 0.0
+        self.clips = []  # [path, frames, end_time, start_time] being collected
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.written = 0
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def add(self, frame, now=None):
+        """Offer a frame from the frame loop - never encodes or blocks"""
+        now = time.time() if now is None else now
+        if now - self.last_add < self.interval:
+            return
+        self.last_add = now
+        with self.cond:
+            self.pending = (now, frame)  # An unencoded older frame is simply replaced
+            self.cond.notify()
+
+    def trigger(self, tag, now=None):
+        """Start a clip for an alert; returns its file name"""
+        now = time.time() if now is None else now
+        suffix = f"_{tag}.{self.format}"
+        with self.cond:
+            same = [clip for clip in self.clips if clip[0].endswith(suffix)]
+            if same:
+                clip = same[-1]
+                cap = clip[3] + self.max_clip
+                if now + self.post_roll <= cap:
+                    clip[2] = now + self.post_roll  # Same alert still going - extend it
+                    return os.path.basename(clip[0])
+                # Too long - end this clip at the cap and continue in a new one from there
+                clip[2] = cap
+                path = self.clip_path(cap, tag)
+                self.clips.append([path, [], now + self.post_roll, cap])
+            else:
+                path = self.clip_path(now, tag)
+                self.clips.append([path, [jpeg for _, jpeg in self.ring], now + self.post_roll, now - self.pre_roll])
+            self.cond.notify()
+        return os.path.basename(path)
+
+    def clip_path(self, start, tag):
+        stamp = datetime.fromtimestamp(start).strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.directory, f"{stamp}_{tag}.{self.format}")
+
+    def run(self):
+        while not self.stopped:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending is not None or self.stopped, timeout=0.5)
+                item, self.pending = self.pending, None
+            if item is not None:
+                self.store(*item)
+            self.finish(time.time())
+
+    def store(self, timestamp, frame):
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+        jpeg = buf.tobytes()
+        with self.cond:
+            self.ring.append((timestamp, jpeg))
+            self.ring_bytes += len(jpeg)
+            while self.ring and (self.ring_bytes > self.max_bytes or timestamp - self.ring[0][0] > self.pre_roll):
+                self.ring_bytes -= len(self.ring.popleft()[1])
+            for clip in self.clips:
+                if clip[3] <= timestamp < clip[2]:
+                    clip[1].append(jpeg)
+
+    def finish(self, now):
+        """Write out every clip whose post-roll is complete"""
+        with self.cond:
+            done = [clip for clip in self.clips if now >= clip[2]]
+            self.clips = [clip for clip in self.clips if now < clip[2]]
+        for path, frames, _, _ in done:
+            if frames:
+                self.write(path, frames)
+
+    def write(self, path, frames):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.format == "mp4":
+            first = cv2.imdecode(np.frombuffer(frames[0], np.uint8), cv2.IMREAD_COLOR)
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, first.shape[1::-1])
+            for jpeg in frames:
+                writer.write(cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR))
+            writer.release()
+        else:
+            with open(path, "wb") as f:
+                for jpeg in frames:
+                    f.write(jpeg)
+        self.written += 1
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] 🎬 {self.name}: saved {len(frames)} frames -> {path}")
+        self.prune()
+
+    def prune(self):
+        """Keep only the newest RECORD_KEEP clips per detector"""
+        clips = sorted(os.listdir(self.directory))
+        for old in clips[:-config.RECORD_KEEP]:
+            os.remove(os.path.join(self.directory, old))
+
+    def close(self):
+        """Flush clips still collecting post-roll, then stop"""
+        self.finish(float("inf"))
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
@@ -0,0 +1,117 @@
+"""
+Per-camera regions of interest.
+
+A detector with an ROI never infers on the full frame: each ROI polygon's
+bounding box is cropped (optionally split into overlapping tiles along its
+long side), pixels outside the polygon are blanked, and only those crops go
+through the model. Each crop is letterboxed to the model's `imgsz` on its
+own, so small hands and heads cover more input pixels than in a scaled-down
+full frame. Boxes are shifted back to frame coordinates and de-duplicated
+across tile overlaps, and the merged result behaves like an ordinary
+full-frame YOLO result for the alert logic, rendering and replay.
+
+Polygons are configured per detector (FOOTBOARD_ROI, WINDOW_ROI,
+DRIVER_ROI) in FRAME_SIZE pixels as "x,y;x,y;x,y", with several polygons
+separated by "|":
+
+    WINDOW_ROI="0,120;640,120;640,260;0,260" WINDOW_ROI_TILES=2
+"""
+import cv2
+import numpy as np
+import torch
+from torchvision.ops import batched_nms
+from ultralytics.engine.results import Results
+
+from edge import config
+
+PAD_VALUE = 114  # YOLO letterbox gray - blanked pixels look like padding to the model
+
+
+def parse_polygons(spec):
+    """"x,y;x,y;...|x,y;..." -> list of (N, 2) int32 arrays"""
+    polygons = []
+    for part in spec.split("|"):
+        points = [tuple(int(float(v)) for v in point.split(",")) for point in part.split(";") if point.strip()]
+        if len(points) < 3:
+            raise ValueError(f"ROI polygon needs at least 3 points: {part!r}")
+        polygons.append(np.array(points, dtype=np.int32))
+    return polygons
+
+
+def split(x0, y0, x1, y1, tiles, overlap):
+    """Split a box into `tiles` overlapping windows along its long side"""
+    if tiles <= 1:
+        return [(x0, y0, x1, y1)]
+    horizontal = x1 - x0 >= y1 - y0
+    lo, hi = (x0, x1) if horizontal else (y0, y1)
+    size = (hi - lo) / (tiles - (tiles - 1) * overlap)
+    step = size * (1 - overlap)
+    windows = []
+    for i in range(tiles):
+        a = int(lo + i * step)
+        b = hi if i == tiles - 1 else int(lo + i * step + size)
+        windows.append((a, y0, b, y1) if horizontal else (x0, a, x1, b))
+    return windows
+
+
+class RegionOfInterest:
+    def __init__(self, polygons, frame_size=config.FRAME_SIZE, tiles=1, overlap=0.2):
+        width, height = frame_size
+        self.polygons = polygons
+        inside = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(inside, polygons, 1)
+
+        self.windows = []  # (x0, y0, x1, y1) crops in frame pixels
+        self.blank = []    # Per window: boolean mask of pixels outside every polygon, None if there are none
+        for polygon in polygons:
+            x, y, w, h = cv2.boundingRect(polygon)
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = min(x + w, width), min(y + h, height)
+            for window in split(x0, y0, x1, y1, tiles, overlap):
+                wx0, wy0, wx1, wy1 = window
+                outside = inside[wy0:wy1, wx0:wx1] == 0
+                self.windows.append(window)
+                self.blank.append(outside if outside.any() else None)
+
+    @classmethod
+    def from_config(cls, spec, tiles=1):
+        """ROI for a detector's config entry, or None when no polygon is set"""
+        if not spec:
+            return None
+        return cls(parse_polygons(spec), tiles=tiles)
+
+    def crops(self, frame):
+        """Model inputs for `frame` - one per ROI window"""
+        crops = []
+        for (x0, y0, x1, y1), outside in zip(self.windows, self.blank):
+            crop = frame[y0:y1, x0:x1]
+            if outside is not None:
+                crop = crop.copy()
+                crop[outside] = PAD_VALUE
+            crops.append(crop)
+        return crops
+
+    def merge(self, results, frame, iou=0.7):
+        """One full-frame Results from the per-window results of `crops(frame)`"""
+        rows = []
+        for (x0, y0, _, _), result in zip(self.windows, results):
+            data = result.boxes.data
+            if len(data):
+                data = data.clone()
+                data[:, [0, 2]] += x0
+                data[:, [1, 3]] += y0
+                rows.append(data)
+        first = results[0]
+        if rows:
+            data = torch.cat(rows)
+            if len(self.windows) > 1:
+                # The same object seen in two overlapping tiles
+                keep = batched_nms(data[:, :4].float(), data[:, 4].float(), data[:, 5].long(), iou)
+                data = data[keep]
+        else:
+            data = first.boxes.data[:0]
+        return Results(frame, path=first.path, names=first.names, boxes=data)
+
+    def draw(self, frame):
+        cv2.polylines(frame, self.polygons, True, (255, 255, 0), 1)
+        return frame
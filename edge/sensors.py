@@ -0,0 +1,96 @@
+"""
+Phone sensor feeds (IP Webcam `sensors.json`).
+"""
+import threading
+import time
+
+import requests
+
+from edge import config
+
+
+class SpeedTracker:
+    """
+    GPS speed from the phone, polled in a background thread over one
+    keep-alive connection. Each poll asks only for samples newer than the
+    last one seen (`sense=gps_speed&from=<ts>`), so the response stays a
+    handful of bytes instead of the whole sensor history.
+
+    `speed_kmh` extrapolates from the last two samples up to
+    SPEED_EXTRAPOLATE_MAX seconds past the newest one. When no sample has
+    arrived for SPEED_STALE_AFTER seconds `stale` is set and `speed_kmh`
+    holds the last known value - it is never faked to 0.
+    """
+
+    def __init__(self, url, interval=config.SPEED_POLL_INTERVAL):
+        self.url = url
+        self.interval = interval
+        self.session = requests.Session()
+        self.last_ts = None       # Phone timestamp (ms) of the newest sample
+        self.offset = None        # Local clock minus phone clock, seconds
+        self.samples = []         # Last two (local_time, speed_kmh)
+        self.updated = None       # Local time of the newest sample
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.stopped = False
+        threading.Thread(target=self.update, daemon=True).start()
+
+    def update(self):
+        while not self.stopped:
+            params = {"sense": "gps_speed"}
+            if self.last_ts is not None:
+                params["from"] = self.last_ts
+            try:
+                response = self.session.get(self.url, params=params, timeout=0.5)
+                data = response.json().get("gps_speed", {}).get("data", [])
+                received = time.time()
+                for ts, values in data:
+                    if self.last_ts is None or ts > self.last_ts:
+                        self.add_sample(ts, values[0] * 3.6, received)  # m/s -> km/h
+            except Exception:
+                # GPS signal lost or network failure - keep the last sample, staleness tells the rest
+                self.errors += 1
+            time.sleep(self.interval)
+
+    def add_sample(self, ts, speed_kmh, received):
+        # The smallest receive-minus-phone gap seen is the best estimate of the clock offset
+        offset = received - ts / 1000
+        if self.offset is None or offset < self.offset:
+            self.offset = offset
+        with self.lock:
+            self.samples = (self.samples + [(ts / 1000 + self.offset, speed_kmh)])[-2:]
+            self.last_ts = ts
+            self.updated = received
+
+    @property
+    def stale(self):
+        return self.updated is None or time.time() - self.updated > config.SPEED_STALE_AFTER
+
+    @property
+    def speed_kmh(self):
+        with self.lock:
+            samples = self.samples
+        if not samples:
+            return 0.0
+        t1, v1 = samples[-1]
+        if len(samples) < 2 or self.stale:
+            return v1
+        t0, v0 = samples[0]
+        if t1 <= t0:
+            return v1
+        ahead = min(time.time() - t1, config.SPEED_EXTRAPOLATE_MAX)
+        return max(0.0, v1 + (v1 - v0) / (t1 - t0) * ahead)
+
+    def stop(self):
+        self.stopped = True
+        self.session.close()
+
+
+class FixedSpeed:
+    """Constant speed source for recorded clips and benchmarks"""
+
+    stale = False
+
+    def __init__(self, speed_kmh=0.0):
+        self.speed_kmh = speed_kmh
+        self.updated = float("inf")  # Never stale
@@ -0,0 +1,145 @@
+"""
+Durable on-device alert spool.
+
+Alerts the dispatcher could not deliver (server unreachable, queue full) are
+appended to a local SQLite file so a dead zone never loses CRITICAL/DANGER
+events. `append()` only touches memory; a writer thread commits in batches
+(one fsync per batch) so thousands of alerts can arrive in a burst without
+stalling the frame loop. A committed batch survives a power cut; CRITICAL
+and DANGER alerts wake the writer at once instead of waiting up to
+SPOOL_FLUSH_INTERVAL. Disk use is bounded by `max_rows` - when the spool
+overflows, the oldest low-severity alerts go first. A row the server keeps
+failing on is moved to `dead_alerts` after a few attempts so it cannot hold
+back the rows behind it.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from edge import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    url TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS alerts_ts ON alerts (ts, id);
+CREATE TABLE IF NOT EXISTS dead_alerts (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    url TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    failed_at REAL NOT NULL
+);
+"""
+
+
+class AlertSpool:
+    def __init__(self, path=config.SPOOL_PATH, max_rows=config.SPOOL_MAX_ROWS,
+                 flush_interval=config.SPOOL_FLUSH_INTERVAL):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = False
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # FULL: fsync the WAL on every commit (NORMAL only syncs at checkpoints and can lose recent commits)
+        self.db.execute("PRAGMA synchronous=FULL")
+        self.db.executescript(SCHEMA)
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(alerts)")]
+        if "attempts" not in columns:  # Spool written before attempts were counted
+            self.db.execute("ALTER TABLE alerts ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            self.db.commit()
+        self.count = self.db.execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+
+        threading.Thread(target=self.writer, daemon=True).start()
+
+    def append(self, url, payload, rank, ts=None):
+        """Spool one alert - memory only, committed by the writer thread"""
+        with self.pending_lock:
+            self.pending.append((ts or time.time(), url, rank, json.dumps(payload)))
+            if len(self.pending) >= 500 or rank >= 3:
+                self.wake.set()  # Burst, or a CRITICAL/DANGER alert that must reach the disk now
+
+    def flush(self):
+        with self.pending_lock:
+            rows, self.pending = self.pending, []
+        if not rows:
+            return
+        with self.lock:
+            self.db.executemany("INSERT INTO alerts (ts, url, rank, payload) VALUES (?, ?, ?, ?)", rows)
+            self.count += len(rows)
+            if self.count > self.max_rows:
+                self._trim(self.count - self.max_rows)
+            self.db.commit()
+
+    def _trim(self, excess):
+        """Drop the oldest lowest-severity rows to stay within max_rows"""
+        self.db.execute(
+            "DELETE FROM alerts WHERE id IN (SELECT id FROM alerts ORDER BY rank ASC, ts ASC LIMIT ?)",
+            (excess,)
+        )
+        self.count -= excess
+        print(f"⚠️ Alert spool full - dropped {excess} oldest low-severity alerts")
+
+    def writer(self):
+        while not self.stopped:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def oldest(self, limit=50):
+        """Return up to `limit` spooled alerts in timestamp order"""
+        self.flush()
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, ts, url, payload FROM alerts ORDER BY ts, id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row_id, ts, url, json.loads(payload)) for row_id, ts, url, payload in rows]
+
+    def delete(self, ids):
+        if not ids:
+            return
+        with self.lock:
+            self.db.executemany("DELETE FROM alerts WHERE id = ?", [(i,) for i in ids])
+            self.db.commit()
+            self.count -= len(ids)
+
+    def fail(self, row_id, max_attempts):
+        """Count one failed delivery; after `max_attempts` the row moves to dead_alerts. True if it moved"""
+        with self.lock:
+            self.db.execute("UPDATE alerts SET attempts = attempts + 1 WHERE id = ?", (row_id,))
+            moved = self.db.execute(
+                "INSERT INTO dead_alerts (id, ts, url, rank, payload, attempts, failed_at) "
+                "SELECT id, ts, url, rank, payload, attempts, ? FROM alerts WHERE id = ? AND attempts >= ?",
+                (time.time(), row_id, max_attempts)
+            ).rowcount
+            if moved:
+                self.db.execute("DELETE FROM alerts WHERE id = ?", (row_id,))
+                self.count -= 1
+            self.db.commit()
+        return bool(moved)
+
+    def __len__(self):
+        return self.count + len(self.pending)
+
+    def close(self):
+        self.stopped = True
+        self.wake.set()
+        self.flush()
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,139 @@
+"""
+Keyframe detection with IoU track propagation.
+
+YOLO runs only on every KEYFRAME_INTERVAL-th frame. On a keyframe each
+detection is matched to an existing track of the same class by IoU (greedy,
+highest overlap first) against the track's predicted box; unmatched
+detections start new tracks and tracks unmatched for more than
+TRACK_MAX_MISSES keyframes are dropped. In between, every track moves by
+its constant per-frame velocity, so the alert logic and the overlay see a
+box on every frame while the model runs on a fraction of them.
+
+Each track keeps its id for as long as it is matched, which lets detectors
+raise an alert once per object (`Tracker.once`) instead of once per
+cooldown period.
+"""
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+from edge import config
+from edge.postprocess import Detections
+
+
+def box_iou(a, b):
+    """(N, 4) x (M, 4) xyxy boxes -> (N, M) IoU"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+class Track:
+    __slots__ = ("id", "cls", "conf", "box", "velocity", "anchor", "age", "misses")
+
+    def __init__(self, track_id, cls, conf, box):
+        self.id = track_id
+        self.cls = cls
+        self.conf = conf
+        self.box = box                   # Current (predicted) box
+        self.velocity = np.zeros(4, dtype=np.float32)  # Box change per frame
+        self.anchor = box                # Box at the last matched keyframe
+        self.age = 0                     # Frames since the anchor
+        self.misses = 0                  # Keyframes without a match
+
+
+class Tracker:
+    def __init__(self, keyframe_interval=config.KEYFRAME_INTERVAL, iou_threshold=config.TRACK_IOU,
+                 max_misses=config.TRACK_MAX_MISSES):
+        self.interval = max(1, keyframe_interval)
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.tracks = []
+        self.next_id = 1
+        self.frames = 0
+        self.num_classes = 0
+        self.alerted = set()  # (track_id, tag) pairs already alerted
+
+    def keyframe_due(self):
+        return self.frames % self.interval == 0
+
+    def advance(self):
+        for track in self.tracks:
+            track.box = track.box + track.velocity
+            track.age += 1
+
+    def update(self, detections):
+        """Keyframe: match fresh detections to tracks; returns them with track ids"""
+        self.frames += 1
+        self.num_classes = len(detections.best)
+        self.advance()
+
+        matched = np.full(len(detections), -1)
+        if self.tracks and len(detections):
+            boxes = np.stack([track.box for track in self.tracks])
+            classes = np.array([track.cls for track in self.tracks])
+            iou = box_iou(boxes, detections.xyxy)
+            iou[classes[:, None] != detections.cls[None, :]] = 0
+            used = set()
+            for t, d in sorted(zip(*np.nonzero(iou >= self.iou_threshold)), key=lambda p: -iou[p]):
+                if t in used or matched[d] >= 0:
+                    continue
+                used.add(t)
+                matched[d] = t
+
+        ids = np.zeros(len(detections), dtype=np.int64)
+        for d in range(len(detections)):
+            box = detections.xyxy[d].astype(np.float32)
+            if matched[d] >= 0:
+                track = self.tracks[matched[d]]
+                velocity = (box - track.anchor) / max(track.age, 1)
+                track.velocity = 0.5 * track.velocity + 0.5 * velocity
+                track.box = track.anchor = box
+                track.conf = float(detections.conf[d])
+                track.age = track.misses = 0
+            else:
+                track = Track(self.next_id, int(detections.cls[d]), float(detections.conf[d]), box)
+                self.next_id += 1
+                self.tracks.append(track)
+            ids[d] = track.id
+
+        seen = set(ids.tolist())
+        for track in self.tracks:
+            if track.id not in seen:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+        live = {track.id for track in self.tracks}
+        self.alerted = {key for key in self.alerted if key[0] in live}
+        return Detections(detections.cls, detections.conf, detections.xyxy, detections.best, ids)
+
+    def propagate(self):
+        """In-between frame: every visible track moved one frame forward"""
+        self.frames += 1
+        self.advance()
+        visible = [track for track in self.tracks if track.misses == 0]
+        cls = np.array([track.cls for track in visible], dtype=np.int64)
+        conf = np.array([track.conf for track in visible], dtype=np.float32)
+        xyxy = np.stack([track.box for track in visible]) if visible else np.zeros((0, 4), dtype=np.float32)
+        best = np.zeros(self.num_classes, dtype=np.float32)
+        np.maximum.at(best, cls, conf)
+        ids = np.array([track.id for track in visible], dtype=np.int64)
+        return Detections(cls, conf, xyxy, best, ids)
+
+    def once(self, track_id, tag):
+        """True the first time (track_id, tag) is asked about"""
+        key = (track_id, tag)
+        if key in self.alerted:
+            return False
+        self.alerted.add(key)
+        return True
+
+
+def as_result(detections, frame, template):
+    """Tracked Detections drawn on `frame` as an ultralytics Results (boxes labelled with track ids)"""
+    data = np.concatenate([
+        detections.xyxy, detections.ids[:, None], detections.conf[:, None], detections.cls[:, None]
+    ], axis=1).astype(np.float32) if len(detections) else np.zeros((0, 7), dtype=np.float32)
+    return Results(frame, path=template.path, names=template.names, boxes=torch.from_numpy(data))
@@ -2,6 +2,8 @@ import { pool } from '../config/postgres.js';
 import { spawn } from 'child_process';
 import path from 'path';
 import { fileURLToPath } from 'url';
+import { startDetector, stopDetector, getDetectorSession } from '../service/detectionDaemon.js';
+import { invalidBatch, bulkInsertAlerts } from '../service/alertBatch.js';
 
 // Get current directory
 const __filename = fileURLToPath(import.meta.url);
@@ -24,7 +26,7 @@ const MODEL_CONFIG = {
 };
 
 // POST - Start model process
-export const startModel = (req, res) => {
+export const startModel = async (req, res) => {
   const { driver_id } = req.body;
   const driverId = driver_id || 'default';
   
@@ -42,6 +44,19 @@ export const startModel = (req, res) => {
   }
   
   try {
+    // Prefer the resident daemon - its models are already loaded and warm
+    const session = await startDetector(driverId, 'driver');
+    if (session) {
+      console.log(`⚡ Driver monitoring model started in daemon for driver ${driverId} (first inference after ${session.time_to_first_inference}s)`);
+      return res.json({
+        success: true,
+        running: true,
+        message: 'Driver monitoring model started successfully',
+        warm: true,
+        time_to_first_inference: session.time_to_first_inference
+      });
+    }
+    
     console.log(`🚗 Starting driver monitoring model for driver ${driverId}...`);
     console.log(`📁 Python: ${MODEL_CONFIG.pythonPath}`);
     console.log(`📁 Script: ${MODEL_CONFIG.scriptPath}`);
@@ -91,15 +106,16 @@ export const startModel = (req, res) => {
 };
 
 // POST - Stop model process
-export const stopModel = (req, res) => {
+export const stopModel = async (req, res) => {
   const { driver_id } = req.body;
   const driverId = driver_id || 'default';
+  const stoppedInDaemon = await stopDetector(driverId, 'driver');
   
   if (!modelProcesses.has(driverId)) {
     return res.json({ 
       success: true, 
       running: false, 
-      message: 'Model is not running' 
+      message: stoppedInDaemon ? 'Driver monitoring model stopped successfully' : 'Model is not running' 
     });
   }
   
@@ -136,13 +152,26 @@ export const stopModel = (req, res) => {
 };
 
 // GET - Check model status
-export const getModelStatus = (req, res) => {
+export const getModelStatus = async (req, res) => {
   const { driver_id } = req.query;
   const driverId = driver_id || 'default';
   
   const modelProcess = modelProcesses.get(driverId);
   const isRunning = modelProcess && !modelProcess.killed;
   
+  if (!isRunning) {
+    const session = await getDetectorSession(driverId, 'driver');
+    if (session) {
+      return res.json({
+        running: session.running,
+        pid: null,
+        warm: true,
+        time_to_first_inference: session.time_to_first_inference,
+        driver_id: driverId
+      });
+    }
+  }
+  
   res.json({
     running: isRunning,
     pid: isRunning ? modelProcess.pid : null
@@ -157,21 +186,26 @@ export const receiveHeartbeat = async (req, res) => {
     return res.status(400).json({ error: 'driver_id is required' });
   }
   
-  const now = new Date();
-  driverHeartbeats.set(driver_id, now);
-  
-  // Initialize system as enabled if not set
-  if (!driverSystemEnabled.has(driver_id)) {
-    driverSystemEnabled.set(driver_id, true);
-  }
+  const systemEnabled = recordHeartbeat(driver_id);
   
   res.json({ 
     success: true, 
-    timestamp: now,
-    system_enabled: driverSystemEnabled.get(driver_id)
+    timestamp: driverHeartbeats.get(driver_id),
+    system_enabled: systemEnabled
   });
 };
 
+// Record a heartbeat (also used by the per-bus heartbeat) - returns whether the system is enabled
+export const recordHeartbeat = (driverId) => {
+  driverHeartbeats.set(driverId, new Date());
+  
+  // Initialize system as enabled if not set
+  if (!driverSystemEnabled.has(driverId)) {
+    driverSystemEnabled.set(driverId, true);
+  }
+  return driverSystemEnabled.get(driverId);
+};
+
 // GET - Get system status
 export const getSystemStatus = (req, res) => {
   const { driver_id } = req.query;
@@ -234,6 +268,42 @@ export const createAlert = async (req, res) => {
   }
 };
 
+// POST - Create a batch of alerts (gzip JSON from edge/dispatch.py)
+export const createAlertBatch = async (req, res) => {
+  const { alerts } = req.body;
+  const problem = invalidBatch(alerts);
+  if (problem) {
+    return res.status(400).json({ error: problem });
+  }
+
+  // Same required fields as a single alert; invalid entries are skipped
+  const valid = alerts.filter((alert) => alert.driver_id && alert.alert_type && alert.severity);
+
+  try {
+    const inserted = await bulkInsertAlerts(
+      'driver_monitoring',
+      ['driver_id', 'alert_type', 'severity', 'confidence', 'message', 'sound', 'detection_class', 'timestamp', 'source', 'seq'],
+      valid.map((alert) => [
+        alert.driver_id,
+        alert.alert_type,
+        alert.severity,
+        alert.confidence || null,
+        alert.message || null,
+        alert.sound || false,
+        alert.detection_class || null,
+        Date.parse(alert.timestamp) || Date.now(),
+        alert.source || null,
+        alert.seq ?? null
+      ])
+    );
+
+    res.status(201).json({ success: true, received: alerts.length, inserted, invalid: alerts.length - valid.length });
+  } catch (error) {
+    console.error('Failed to create driver monitoring alert batch:', error);
+    res.status(500).json({ error: 'Failed to create alerts' });
+  }
+};
+
 // GET - Get alerts for driver
 export const getAlerts = async (req, res) => {
   const { driver_id, limit = 50 } = req.query;
@@ -0,0 +1,48 @@
+import { recordHeartbeat as recordSafetyHeartbeat } from './safetyController.js';
+import { recordHeartbeat as recordWindowHeartbeat } from './windowSafetyController.js';
+import { recordHeartbeat as recordDriverHeartbeat } from './driverMonitorController.js';
+
+// Detector name (as sent by the edge runtime) -> that module's heartbeat recorder
+const DETECTORS = {
+  footboard: recordSafetyHeartbeat,
+  window: recordWindowHeartbeat,
+  driver: recordDriverHeartbeat
+};
+
+// Last reported health per bus (per driver)
+const busHealth = new Map();
+
+// POST - One heartbeat for every detector running on a bus
+export const receiveBusHeartbeat = (req, res) => {
+  const { driver_id, detectors } = req.body;
+  
+  if (!driver_id || !detectors || typeof detectors !== 'object') {
+    return res.status(400).json({ error: 'driver_id and detectors are required' });
+  }
+  
+  const now = new Date();
+  const systemEnabled = {};
+  for (const name of Object.keys(detectors)) {
+    const record = DETECTORS[name];
+    if (record) {
+      systemEnabled[name] = record(driver_id);
+    }
+  }
+  busHealth.set(driver_id, { timestamp: now, detectors });
+  
+  res.json({
+    success: true,
+    timestamp: now,
+    system_enabled: systemEnabled
+  });
+};
+
+// GET - Last health report of a bus
+export const getBusHealth = (req, res) => {
+  const health = busHealth.get(req.params.driver_id);
+  
+  if (!health) {
+    return res.status(404).json({ error: 'No heartbeat received for this driver' });
+  }
+  res.json(health);
+};
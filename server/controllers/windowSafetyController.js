@@ -2,6 +2,8 @@ import { pool } from '../config/postgres.js';
 import { spawn } from 'child_process';
 import path from 'path';
 import { fileURLToPath } from 'url';
+import { startDetector, stopDetector, getDetectorSession } from '../service/detectionDaemon.js';
+import { invalidBatch, bulkInsertAlerts } from '../service/alertBatch.js';
 
 // Get current directory
 const __filename = fileURLToPath(import.meta.url);
@@ -24,7 +26,7 @@ const MODEL_CONFIG = {
 };
 
 // POST - Start model process
-export const startModel = (req, res) => {
+export const startModel = async (req, res) => {
   const { driver_id } = req.body;
   const driverId = driver_id || 'default';
   
@@ -42,6 +44,20 @@ export const startModel = (req, res) => {
   }
   
   try {
+    // Prefer the resident daemon - its models are already loaded and warm
+    const session = await startDetector(driverId, 'window');
+    if (session) {
+      driverSystemEnabled.set(driverId, true);
+      console.log(`⚡ Window safety model started in daemon for driver ${driverId} (first inference after ${session.time_to_first_inference}s)`);
+      return res.json({
+        success: true,
+        running: true,
+        message: 'Window safety model started successfully',
+        warm: true,
+        time_to_first_inference: session.time_to_first_inference
+      });
+    }
+    
     console.log(`🪟 Starting window safety model for driver ${driverId}...`);
     console.log(`📁 Python: ${MODEL_CONFIG.pythonPath}`);
     console.log(`📁 Script: ${MODEL_CONFIG.scriptPath}`);
@@ -87,17 +103,21 @@ export const startModel = (req, res) => {
 };
 
 // POST - Stop model process
-export const stopModel = (req, res) => {
+export const stopModel = async (req, res) => {
   const { driver_id } = req.body;
   const driverId = driver_id || 'default';
+  const stoppedInDaemon = await stopDetector(driverId, 'window');
   
   const modelProcess = modelProcesses.get(driverId);
   
   if (!modelProcess) {
+    if (stoppedInDaemon) {
+      driverSystemEnabled.set(driverId, false);
+    }
     return res.json({ 
       success: true, 
       running: false, 
-      message: 'Window safety model is not running' 
+      message: stoppedInDaemon ? 'Window safety model stopped successfully' : 'Window safety model is not running' 
     });
   }
   
@@ -126,13 +146,26 @@ export const stopModel = (req, res) => {
 };
 
 // GET - Check model status
-export const getModelStatus = (req, res) => {
+export const getModelStatus = async (req, res) => {
   const { driver_id } = req.query;
   const driverId = driver_id || 'default';
   
   const modelProcess = modelProcesses.get(driverId);
   const isRunning = modelProcess && !modelProcess.killed;
   
+  if (!isRunning) {
+    const session = await getDetectorSession(driverId, 'window');
+    if (session) {
+      return res.json({
+        running: session.running,
+        pid: null,
+        warm: true,
+        time_to_first_inference: session.time_to_first_inference,
+        driver_id: driverId
+      });
+    }
+  }
+  
   res.json({
     running: isRunning,
     pid: isRunning ? modelProcess.pid : null,
@@ -145,8 +178,17 @@ export const receiveHeartbeat = (req, res) => {
   const { driver_id } = req.body;
   const driverId = driver_id || 'default';
   
+  res.status(200).json({
+    success: true,
+    message: 'Heartbeat received',
+    system_enabled: recordHeartbeat(driverId)
+  });
+};
+
+// Record a heartbeat (also used by the per-bus heartbeat) - returns whether the system is enabled
+export const recordHeartbeat = (driverId) => {
   driverHeartbeats.set(driverId, new Date());
-  res.status(200).json({ success: true, message: 'Heartbeat received' });
+  return driverSystemEnabled.get(driverId) !== false;
 };
 
 // GET - Check system status
@@ -232,6 +274,49 @@ export const createAlert = async (req, res) => {
   }
 };
 
+// POST - Receive a batch of alerts (gzip JSON from edge/dispatch.py)
+export const createAlertBatch = async (req, res) => {
+  const { alerts } = req.body;
+  const problem = invalidBatch(alerts);
+  if (problem) {
+    return res.status(400).json({ error: problem });
+  }
+
+  try {
+    // Alerts of drivers whose system is disabled are acknowledged, not saved
+    const accepted = alerts.filter((alert) => driverSystemEnabled.get(alert.driver_id || 'default') !== false);
+    const inserted = await bulkInsertAlerts(
+      'window_safety',
+      ['driver_id', 'timestamp', 'alert_type', 'status', 'confidence', 'message', 'sound', 'detection_class', 'source', 'seq'],
+      accepted.map((alert) => [
+        alert.driver_id || null,
+        alert.timestamp || new Date().toISOString(),
+        alert.alert_type,
+        alert.status || alert.severity,
+        alert.confidence || 0,
+        alert.message,
+        alert.sound || false,
+        alert.detection_class || null,
+        alert.source || null,
+        alert.seq ?? null
+      ])
+    );
+
+    console.log(`🪟 Window Safety Alert batch: ${inserted} saved of ${alerts.length}`);
+
+    // Update heartbeat on any alert
+    const now = new Date();
+    for (const alert of accepted) {
+      driverHeartbeats.set(alert.driver_id || 'default', now);
+    }
+
+    res.status(201).json({ success: true, received: alerts.length, inserted });
+  } catch (error) {
+    console.error('Error saving window safety alert batch:', error);
+    res.status(500).json({ error: error.message });
+  }
+};
+
 // GET - Fetch alerts for frontend
 export const getAlerts = async (req, res) => {
   try {
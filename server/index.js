@@ -20,6 +20,7 @@ import driverMonitorRoutes from './routes/driverMonitorRoutes.js'
 import safetyRoutes from './routes/safetyRoutes.js'
 
 import windowSafetyRoutes from './routes/windowSafetyRoutes.js';
+import heartbeatRoutes from './routes/heartbeatRoutes.js';
 
 
 const app = express();
@@ -51,10 +52,12 @@ const limiter = rateLimit({
   max: process.env.NODE_ENV === 'production' ? 100 : 1000, // Higher limit in development
   standardHeaders: true,
   legacyHeaders: false,
+  // RATE_LIMIT_DISABLED=1 turns the limiter off for local load tests (edge/loadgen.py)
+  skip: () => process.env.RATE_LIMIT_DISABLED === '1',
 });
 app.use(limiter);
 
-app.use(express.json());
+app.use(express.json({ limit: '1mb' })); // Gzip alert batches are inflated before parsing
 app.use(cookieParser());
 
 
@@ -78,6 +81,7 @@ app.use('/api/parent', parentRoutes);
 app.use('/api/driver-monitor', driverMonitorRoutes);
 app.use('/api/safety', safetyRoutes);
 app.use('/api/window-safety', windowSafetyRoutes);
+app.use('/api/heartbeat', heartbeatRoutes);
 
 app.use(errorHandler);
 
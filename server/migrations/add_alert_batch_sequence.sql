@@ -0,0 +1,26 @@
+-- Alert Batch Idempotency
+-- Run this SQL in your PostgreSQL database before enabling batched alert uploads
+-- Each edge dispatcher numbers its alerts; (source, seq) identifies an alert so
+-- a retried or replayed batch never stores the same alert twice
+
+ALTER TABLE public.foot_board_safty
+  ADD COLUMN IF NOT EXISTS source TEXT,
+  ADD COLUMN IF NOT EXISTS seq BIGINT;
+
+ALTER TABLE public.window_safety
+  ADD COLUMN IF NOT EXISTS source TEXT,
+  ADD COLUMN IF NOT EXISTS seq BIGINT;
+
+ALTER TABLE public.driver_monitoring
+  ADD COLUMN IF NOT EXISTS source TEXT,
+  ADD COLUMN IF NOT EXISTS seq BIGINT;
+
+-- Single-alert inserts leave both NULL and never conflict
+CREATE UNIQUE INDEX IF NOT EXISTS idx_foot_board_safty_source_seq
+ON public.foot_board_safty(source, seq);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_window_safety_source_seq
+ON public.window_safety(source, seq);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_driver_monitoring_source_seq
+ON public.driver_monitoring(source, seq);
@@ -0,0 +1,13 @@
+import express from 'express';
+import {
+  receiveBusHeartbeat,
+  getBusHealth
+} from '../controllers/heartbeatController.js';
+
+const router = express.Router();
+
+// One heartbeat per bus for all of its detectors
+router.post('/', receiveBusHeartbeat);
+router.get('/:driver_id', getBusHealth);
+
+export default router;
@@ -7,6 +7,7 @@ import {
   stopModel,
   getModelStatus,
   createAlert,
+  createAlertBatch,
   getAlerts,
   getCriticalAlerts,
   getStats
@@ -26,6 +27,7 @@ router.get('/model/status', getModelStatus);
 
 // Alerts
 router.post('/alerts', createAlert);
+router.post('/alerts/batch', createAlertBatch);
 router.get('/alerts', getAlerts);
 router.get('/alerts/critical', getCriticalAlerts);
 
@@ -4,6 +4,7 @@ import {
   getSystemStatus,
   toggleSystem,
   createAlert,
+  createAlertBatch,
   getAlerts,
   getCriticalAlerts,
   getStats,
@@ -26,6 +27,7 @@ router.post('/toggle', toggleSystem);
 
 // Alerts
 router.post('/alerts', createAlert);
+router.post('/alerts/batch', createAlertBatch);
 router.get('/alerts', getAlerts);
 router.get('/alerts/critical', getCriticalAlerts);
 
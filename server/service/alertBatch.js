@@ -0,0 +1,55 @@
+import { pool } from '../config/postgres.js';
+
+// Largest batch one upload may carry (the edge dispatcher sends up to ALERT_BATCH_SIZE = 100)
+export const MAX_BATCH_ALERTS = 500;
+
+// Rows per INSERT statement - stays far below Postgres' 65535 bind parameters
+const ROWS_PER_INSERT = 250;
+
+// Error message for an invalid batch body, or null
+export const invalidBatch = (alerts) => {
+  if (!Array.isArray(alerts) || alerts.length === 0) {
+    return 'alerts must be a non-empty array';
+  }
+  if (alerts.length > MAX_BATCH_ALERTS) {
+    return `at most ${MAX_BATCH_ALERTS} alerts per batch`;
+  }
+  return null;
+};
+
+// Insert alert rows with multi-row INSERTs in one transaction.
+// Rows whose (source, seq) is already stored are skipped, so a retried
+// batch never saves an alert twice. Returns the number of rows inserted.
+export const bulkInsertAlerts = async (table, columns, rows) => {
+  if (rows.length === 0) {
+    return 0;
+  }
+  const client = await pool.connect();
+  let inserted = 0;
+  try {
+    await client.query('BEGIN');
+    for (let start = 0; start < rows.length; start += ROWS_PER_INSERT) {
+      const values = [];
+      const tuples = rows.slice(start, start + ROWS_PER_INSERT).map((row) => {
+        const params = row.map((value) => {
+          values.push(value);
+          return `$${values.length}`;
+        });
+        return `(${params.join(', ')})`;
+      });
+      const result = await client.query(
+        `INSERT INTO ${table} (${columns.join(', ')}) VALUES ${tuples.join(', ')}
+         ON CONFLICT (source, seq) DO NOTHING`,
+        values
+      );
+      inserted += result.rowCount;
+    }
+    await client.query('COMMIT');
+  } catch (error) {
+    await client.query('ROLLBACK');
+    throw error;
+  } finally {
+    client.release();
+  }
+  return inserted;
+};
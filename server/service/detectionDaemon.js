@@ -0,0 +1,40 @@
+import axios from 'axios';
+
+// Resident Python detection daemon (edge/daemon.py). Its models stay loaded
+// and warm, so starting a detector takes one frame instead of a cold spawn.
+const DAEMON_URL = process.env.DETECTION_DAEMON_URL || 'http://127.0.0.1:8765';
+
+const daemon = axios.create({ baseURL: DAEMON_URL, timeout: 15000 });
+
+// Start `detector` for a driver - returns its session, or null when the daemon is not running
+export const startDetector = async (driverId, detector) => {
+  try {
+    const { data } = await daemon.post('/start', { driver_id: driverId, detectors: [detector], wait: true });
+    return data.sessions[0];
+  } catch (error) {
+    if (error.response) {
+      throw new Error(error.response.data?.error || error.message);
+    }
+    return null; // Not reachable - caller spawns the model script instead
+  }
+};
+
+// Stop `detector` for a driver - returns true if the daemon was running it
+export const stopDetector = async (driverId, detector) => {
+  try {
+    const { data } = await daemon.post('/stop', { driver_id: driverId, detectors: [detector] });
+    return data.stopped.length > 0;
+  } catch (error) {
+    return false;
+  }
+};
+
+// Daemon session of `detector` for a driver, or null
+export const getDetectorSession = async (driverId, detector) => {
+  try {
+    const { data } = await daemon.get('/status', { params: { driver_id: driverId }, timeout: 2000 });
+    return data.sessions.find((session) => session.detector === detector) || null;
+  } catch (error) {
+    return null;
+  }
+};